@@ -1,25 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from datetime import date
+from typing import List, Optional
 from uuid import UUID
 import app.models as models
 import app.schemas as schemas
+from .. import queries
 from ..database import get_db
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.AppointmentRead])
-def get_all_appointments(db: Session = Depends(get_db)):
-    """Fetches all appointments. Verifies snake_case mapping for 'time_slot'."""
-    return db.query(models.Appointment).all()
+def get_all_appointments(start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)):
+    """Fetches all appointments, optionally dated in [start, end). Verifies snake_case mapping for 'time_slot'."""
+    query = db.query(models.Appointment)
+    if start:
+        query = query.filter(models.Appointment.date >= start)
+    if end:
+        query = query.filter(models.Appointment.date < end)
+    return query.all()
 
 @router.get("/today/{hospital_id}")
 def get_todays_count(hospital_id: UUID, db: Session = Depends(get_db)):
     """Dashboard KPI: Count of all appointments scheduled for today."""
     today = datetime.now().date()
-    count = db.query(models.Appointment).filter(
-        models.Appointment.hospitalId == hospital_id,
-        models.Appointment.date == today
-    ).count()
+    count = queries.appointment_count_on(db, hospital_id, today)
     return {"hospitalId": hospital_id, "date": today, "count": count}
\ No newline at end of file
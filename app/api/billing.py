@@ -1,49 +1,100 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from datetime import date
+from typing import List, Optional
 from uuid import UUID
 import app.models as models
 import app.schemas as schemas
+from .. import queries
 from ..database import get_db
+from ..projection import field_projection, load_options, project
+from ..snapshot import snapshot_backend
 
 router = APIRouter()
 
 @router.get("/invoices/", response_model=List[schemas.InvoiceRead])
-def get_all_invoices(db: Session = Depends(get_db)):
-    """Fetches all invoices. Verifies mapping for 'total_amount' and 'invoice_id'."""
-    return db.query(models.Invoice).all()
+def get_all_invoices(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    fields = Depends(field_projection(schemas.InvoiceRead)),
+    db: Session = Depends(get_db)
+):
+    """
+    Fetches all invoices, optionally created in [start, end). Verifies mapping for 'total_amount' and 'invoice_id'.
+    Items come from one batched SELECT, and only when requested if ?fields= is given.
+    """
+    query = db.query(models.Invoice).options(*load_options(models.Invoice, fields))
+    if start:
+        query = query.filter(models.Invoice.createdAt >= start)
+    if end:
+        query = query.filter(models.Invoice.createdAt < end)
+    return project(schemas.InvoiceRead, query.all(), fields)
+
+@router.get("/invoices/{invoice_id}", response_model=schemas.InvoiceRead)
+def get_invoice(
+    invoice_id: UUID, fields = Depends(field_projection(schemas.InvoiceRead)), db: Session = Depends(get_db)
+):
+    """Fetches one invoice with its items."""
+    invoice = db.query(models.Invoice).options(*load_options(models.Invoice, fields)).filter(
+        models.Invoice.invoiceId == invoice_id
+    ).first()
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return project(schemas.InvoiceRead, invoice, fields)
 
 @router.get("/revenue/total/{hospital_id}")
-def get_total_revenue(hospital_id: UUID, db: Session = Depends(get_db)):
-    """Dashboard KPI: Aggregates total revenue for a specific hospital."""
-    total = db.query(func.sum(models.Invoice.totalAmount)).filter(
-        models.Invoice.hospitalId == hospital_id
-    ).scalar() or 0.0
+def get_total_revenue(
+    hospital_id: UUID, start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)
+):
+    """Dashboard KPI: Aggregates total revenue for a specific hospital, optionally for invoices in [start, end)."""
+    total = queries.total_revenue(db, hospital_id, start, end)
     return {"hospitalId": hospital_id, "totalRevenue": total}
 
 @router.get("/revenue/by-service/{hospital_id}")
-def get_service_revenue_breakdown(hospital_id: UUID, db: Session = Depends(get_db)):
+def get_service_revenue_breakdown(
+    hospital_id: UUID,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    snapshot = Depends(snapshot_backend)
+):
     """Financial Insight: Breakdown of revenue by service type (Bed, Appointment, etc.)."""
-    results = db.query(
+    if snapshot is not None:
+        return snapshot.revenue_by_service(hospital_id, start, end)
+
+    query = db.query(
         models.InvoiceItem.referenceType,
         func.sum(models.InvoiceItem.cost).label("revenue")
     ).join(models.Invoice).filter(
         models.Invoice.hospitalId == hospital_id
-    ).group_by(models.InvoiceItem.referenceType).all()
+    )
+    # Bounds on invoices.created_at prune its monthly partitions before the join
+    if start:
+        query = query.filter(models.Invoice.createdAt >= start)
+    if end:
+        query = query.filter(models.Invoice.createdAt < end)
+    results = query.group_by(models.InvoiceItem.referenceType).all()
 
     # Returns a clean dictionary for frontend charts: {"BED": 5000, "LAB": 2000}
     return {row.referenceType: row.revenue for row in results if row.referenceType}
 
 @router.get("/insurance/summary/{hospital_id}")
-def get_insurance_analytics(hospital_id: UUID, db: Session = Depends(get_db)):
+def get_insurance_analytics(
+    hospital_id: UUID, start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)
+):
     """Measures Insurance Volume: Total claimed amount across the hospital."""
-    results = db.query(
+    query = db.query(
         func.count(models.InsuranceClaim.claimId).label("total_claims"),
         func.sum(models.InsuranceClaim.claimAmount).label("total_value")
     ).join(models.Invoice).filter(
         models.Invoice.hospitalId == hospital_id
-    ).first()
+    )
+    if start:
+        query = query.filter(models.Invoice.createdAt >= start)
+    if end:
+        query = query.filter(models.Invoice.createdAt < end)
+    results = query.first()
 
     return {
         "hospitalId": hospital_id,
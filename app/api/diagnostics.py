@@ -1,28 +1,102 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case
+from datetime import date
+from typing import Optional
 from ..database import get_db
+from ..lab_index import MAX_WORKERS, refresh_lab_value_index
+from ..snapshot import snapshot_backend
 import app.models as models
 from uuid import UUID
 
 router = APIRouter()
 
 @router.get("/load/daily")
-def get_daily_diagnostic_load(db: Session = Depends(get_db)):
+def get_daily_diagnostic_load(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    snapshot = Depends(snapshot_backend)
+):
     """
-    Analytics: Returns the number of lab results uploaded per day.
+    Analytics: Returns the number of lab results uploaded per day, optionally in [start, end).
     Used for Bar Charts showing lab activity trends.
     """
-    results = db.query(
+    if snapshot is not None:
+        return snapshot.daily_lab_load(start, end)
+
+    query = db.query(
         func.date(models.LabResult.uploadedAt).label("day"),
         func.count(models.LabResult.id).label("count")
-    ).group_by(func.date(models.LabResult.uploadedAt)).all()
+    )
+    # Compare the bare column (not date(uploaded_at)) so the monthly partitions get pruned
+    if start:
+        query = query.filter(models.LabResult.uploadedAt >= start)
+    if end:
+        query = query.filter(models.LabResult.uploadedAt < end)
+    results = query.group_by(func.date(models.LabResult.uploadedAt)).all()
     
     return {str(row.day): row.count for row in results if row.day}
 
 @router.get("/centres/rankings/{hospital_id}")
 def get_centre_rankings(hospital_id: UUID, db: Session = Depends(get_db)):
-    hospital_id_str = str(hospital_id)
     return db.query(models.DiagnosticCentre).filter(
-        models.DiagnosticCentre.affiliatedHospital == hospital_id_str
-    ).order_by(models.DiagnosticCentre.rating.desc()).all()
\ No newline at end of file
+        models.DiagnosticCentre.affiliatedHospital == hospital_id
+    ).order_by(models.DiagnosticCentre.rating.desc()).all()
+
+# --- PARSED LAB-VALUE ANALYTICS ---
+
+@router.post("/lab-values/refresh")
+def refresh_lab_values(workers: Optional[int] = Query(None, ge=1, le=MAX_WORKERS), db: Session = Depends(get_db)):
+    """
+    Pipeline: Parses newly uploaded lab results into the typed lab_result_values table.
+    Incremental by uploaded_at watermark; safe to re-run.
+    """
+    return refresh_lab_value_index(db, workers=workers)
+
+@router.get("/lab-values/abnormal-rate")
+def get_abnormal_rate(
+    hospital_id: Optional[UUID] = None,
+    test_id: Optional[UUID] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Analytics: Share of abnormal lab values by test, hospital and period.
+    Runs on the indexed side table instead of reparsing resultData.
+    """
+    period = func.date_trunc(granularity, models.LabResultValue.uploadedAt).label("period")
+    query = db.query(
+        models.LabResultValue.testId,
+        models.LabResultValue.hospitalId,
+        period,
+        func.count(models.LabResultValue.id).label("total"),
+        func.sum(case((models.LabResultValue.abnormal == True, 1), else_=0)).label("abnormal")
+    ).filter(models.LabResultValue.abnormal.isnot(None))
+
+    if hospital_id:
+        query = query.filter(models.LabResultValue.hospitalId == hospital_id)
+    if test_id:
+        query = query.filter(models.LabResultValue.testId == test_id)
+    if start:
+        query = query.filter(models.LabResultValue.uploadedAt >= start)
+    if end:
+        query = query.filter(models.LabResultValue.uploadedAt < end)
+
+    results = query.group_by(
+        models.LabResultValue.testId, models.LabResultValue.hospitalId, period
+    ).order_by(period).all()
+
+    return [
+        {
+            "testId": row.testId,
+            "hospitalId": row.hospitalId,
+            "period": row.period.date().isoformat(),
+            "total": row.total,
+            "abnormal": row.abnormal,
+            "abnormalRate": f"{row.abnormal / row.total * 100:.2f}%"
+        }
+        for row in results
+    ]
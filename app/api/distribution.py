@@ -0,0 +1,196 @@
+import enum
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import app.models as models
+from ..database import get_db
+from ..sketches import TDigest
+
+router = APIRouter()
+
+# Below this many rows quantiles are computed exactly by Postgres (percentile_cont);
+# above it the column is streamed in chunks into a mergeable t-digest.
+EXACT_ROW_THRESHOLD = 50_000
+STREAM_CHUNK_SIZE = 10_000
+SKETCH_TTL_SECONDS = 15 * 60
+DEFAULT_QUANTILES = [0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
+# Each uncached hospital streams its rows once, so regional requests are capped
+MAX_REGIONAL_HOSPITALS = 100
+
+class DistributionMetric(str, enum.Enum):
+    INVOICE_TOTAL = "invoice-total"
+    CLAIM_AMOUNT = "claim-amount"
+    CONSULTATION_FEE = "consultation-fee"
+    CENTRE_RATING = "centre-rating"
+
+# (metric, hospital_id) -> (digest, built_at)
+_sketch_cache: Dict[Tuple[str, UUID], Tuple[TDigest, float]] = {}
+
+def _metric_column(metric: DistributionMetric):
+    return {
+        DistributionMetric.INVOICE_TOTAL: models.Invoice.totalAmount,
+        DistributionMetric.CLAIM_AMOUNT: models.InsuranceClaim.claimAmount,
+        DistributionMetric.CONSULTATION_FEE: models.Doctor.consultation_fee,
+        DistributionMetric.CENTRE_RATING: models.DiagnosticCentre.rating,
+    }[metric]
+
+def _scope(stmt, metric: DistributionMetric, hospital_id: UUID):
+    """Restricts a statement over the metric's table to one hospital."""
+    column = _metric_column(metric)
+    if metric == DistributionMetric.INVOICE_TOTAL:
+        stmt = stmt.where(models.Invoice.hospitalId == hospital_id)
+    elif metric == DistributionMetric.CLAIM_AMOUNT:
+        stmt = stmt.join(models.Invoice, models.InsuranceClaim.invoiceId == models.Invoice.invoiceId).where(
+            models.Invoice.hospitalId == hospital_id
+        )
+    elif metric == DistributionMetric.CONSULTATION_FEE:
+        stmt = stmt.join(models.Staff, models.Doctor.staff_id == models.Staff.staff_id).where(
+            models.Staff.hospital_id == hospital_id
+        )
+    else:
+        stmt = stmt.where(models.DiagnosticCentre.affiliatedHospital == hospital_id)
+    return stmt.where(column.isnot(None))
+
+def _row_count(db: Session, metric: DistributionMetric, hospital_id: UUID) -> int:
+    column = _metric_column(metric)
+    stmt = _scope(select(func.count()).select_from(column.class_), metric, hospital_id)
+    return db.execute(stmt).scalar() or 0
+
+def _exact_quantiles(db: Session, metric: DistributionMetric, hospital_id: UUID, quantiles: List[float]):
+    column = _metric_column(metric)
+    stmt = _scope(
+        select(*[func.percentile_cont(q).within_group(column) for q in quantiles]).select_from(column.class_),
+        metric, hospital_id
+    )
+    row = db.execute(stmt).first()
+    return {str(q): row[i] for i, q in enumerate(quantiles)}
+
+def _build_sketch(db: Session, metric: DistributionMetric, hospital_id: UUID) -> TDigest:
+    """Streams the metric column in chunks into a t-digest."""
+    column = _metric_column(metric)
+    stmt = _scope(select(column), metric, hospital_id).execution_options(
+        stream_results=True, yield_per=STREAM_CHUNK_SIZE
+    )
+    digest = TDigest()
+    for chunk in db.execute(stmt).scalars().partitions(STREAM_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest
+
+def get_sketch(db: Session, metric: DistributionMetric, hospital_id: UUID) -> TDigest:
+    """Returns the cached per-hospital sketch, rebuilding it once it is older than the TTL."""
+    key = (metric.value, hospital_id)
+    cached = _sketch_cache.get(key)
+    if cached and time.monotonic() - cached[1] < SKETCH_TTL_SECONDS:
+        return cached[0]
+    digest = _build_sketch(db, metric, hospital_id)
+    _sketch_cache[key] = (digest, time.monotonic())
+    return digest
+
+def invalidate_sketches(hospital_id: Optional[UUID] = None):
+    """Drops cached sketches for one hospital (or all of them)."""
+    for key in list(_sketch_cache):
+        if hospital_id is None or key[1] == hospital_id:
+            _sketch_cache.pop(key, None)
+
+def _sketch_quantiles(digest: TDigest, quantiles: List[float]):
+    return {str(q): digest.quantile(q) for q in quantiles}
+
+def _sketch_histogram(digest: TDigest, bins: int):
+    if not digest.count:
+        return []
+    width = (digest.max - digest.min) / bins or 1.0
+    edges = [digest.min + i * width for i in range(bins + 1)]
+    cumulative = [0.0] + [digest.cdf(edge) for edge in edges[1:-1]] + [1.0]
+    return [
+        {"lower": edges[i], "upper": edges[i + 1],
+         "count": round((cumulative[i + 1] - cumulative[i]) * digest.count)}
+        for i in range(bins)
+    ]
+
+def _exact_histogram(db: Session, metric: DistributionMetric, hospital_id: UUID, bins: int):
+    column = _metric_column(metric)
+    bounds = db.execute(
+        _scope(select(func.min(column), func.max(column)).select_from(column.class_), metric, hospital_id)
+    ).first()
+    low, high = bounds
+    if low is None:
+        return []
+    width = (high - low) / bins or 1.0
+    # width_bucket puts the maximum value into bucket bins + 1, so it is clamped back
+    bucket = func.least(func.width_bucket(column, low, low + width * bins, bins), bins).label("bucket")
+    rows = db.execute(
+        _scope(select(bucket, func.count()).select_from(column.class_), metric, hospital_id).group_by(bucket)
+    ).all()
+    counts = {row[0]: row[1] for row in rows}
+    return [
+        {"lower": low + i * width, "upper": low + (i + 1) * width, "count": counts.get(i + 1, 0)}
+        for i in range(bins)
+    ]
+
+@router.get("/{metric}/quantiles/regional")
+def get_regional_quantiles(
+    metric: DistributionMetric,
+    hospital_ids: List[UUID] = Query(...),
+    q: List[float] = Query(DEFAULT_QUANTILES),
+    db: Session = Depends(get_db)
+):
+    """
+    Analytics: Approximate percentiles across several hospitals.
+    Per-hospital sketches are merged, so no raw rows are re-read for cached hospitals.
+    """
+    if any(not 0 <= value <= 1 for value in q):
+        raise HTTPException(status_code=422, detail="Quantiles must be between 0 and 1")
+    hospital_ids = list(dict.fromkeys(hospital_ids))
+    if len(hospital_ids) > MAX_REGIONAL_HOSPITALS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_REGIONAL_HOSPITALS} hospitals per request")
+    merged = TDigest()
+    for hospital_id in hospital_ids:
+        merged.merge(get_sketch(db, metric, hospital_id).copy())
+    return {
+        "metric": metric,
+        "hospitalIds": hospital_ids,
+        "count": merged.count,
+        "method": "sketch",
+        "quantiles": _sketch_quantiles(merged, q)
+    }
+
+@router.get("/{metric}/quantiles/{hospital_id}")
+def get_quantiles(
+    metric: DistributionMetric,
+    hospital_id: UUID,
+    q: List[float] = Query(DEFAULT_QUANTILES),
+    db: Session = Depends(get_db)
+):
+    """
+    Analytics: Percentiles of a billing/rating metric for one hospital.
+    Exact in the database for small tables, t-digest for large ones.
+    """
+    if any(not 0 <= value <= 1 for value in q):
+        raise HTTPException(status_code=422, detail="Quantiles must be between 0 and 1")
+    count = _row_count(db, metric, hospital_id)
+    if count <= EXACT_ROW_THRESHOLD:
+        quantiles, method = _exact_quantiles(db, metric, hospital_id, q), "exact"
+    else:
+        quantiles, method = _sketch_quantiles(get_sketch(db, metric, hospital_id), q), "sketch"
+    return {"metric": metric, "hospitalId": hospital_id, "count": count, "method": method, "quantiles": quantiles}
+
+@router.get("/{metric}/histogram/{hospital_id}")
+def get_histogram(
+    metric: DistributionMetric,
+    hospital_id: UUID,
+    bins: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Analytics: Equal-width histogram of a metric for one hospital.
+    Used for fee and rating distribution charts.
+    """
+    count = _row_count(db, metric, hospital_id)
+    if count <= EXACT_ROW_THRESHOLD:
+        buckets, method = _exact_histogram(db, metric, hospital_id, bins), "exact"
+    else:
+        buckets, method = _sketch_histogram(get_sketch(db, metric, hospital_id), bins), "sketch"
+    return {"metric": metric, "hospitalId": hospital_id, "count": count, "method": method, "buckets": buckets}
@@ -1,26 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List
 from uuid import UUID
 import app.models as models
 import app.schemas as schemas
+from .. import queries
 from ..database import get_db
+from ..projection import field_projection, project
+from ..refdata import store as refdata
 
 router = APIRouter()
 
+# Upper bound on hospitals per batch network request
+MAX_NETWORK_BATCH = 100
+
 @router.get("/", response_model=List[schemas.HospitalRead])
-def get_all_hospitals(db: Session = Depends(get_db)):
-    """Fetches all hospitals."""
-    return db.query(models.Hospital).all()
+def get_all_hospitals(
+    fields = Depends(field_projection(schemas.HospitalRead)), db: Session = Depends(get_db)
+):
+    """Fetches all hospitals (served from the in-memory reference data); ?fields= narrows each entry."""
+    refdata.ensure_fresh(db)
+    return project(schemas.HospitalRead, refdata.all_hospitals(), fields)
+
+# --- HOSPITAL NETWORK ---
+# Declared before /{hospital_id}, which would otherwise match /network
+
+def _load_network(db: Session, hospital_ids: List[UUID]) -> Dict[UUID, dict]:
+    """
+    Loads pharmacies, ranked diagnostic centres, departments and ambulances
+    for many hospitals. Pharmacies and departments come from the reference data;
+    centres and ambulances take one indexed IN query each.
+    """
+    refdata.ensure_fresh(db)
+    network = {
+        hospital_id: {
+            "hospitalId": hospital_id,
+            "pharmacies": [
+                {"id": row["id"], "name": row["name"], "address": row["address"]}
+                for row in refdata.hospital_pharmacies(hospital_id)
+            ],
+            "diagnosticCentres": [],
+            "departments": [
+                {"departmentId": row.departmentId, "deptName": row.deptName}
+                for row in sorted(refdata.hospital_departments(hospital_id), key=lambda dept: dept.deptName)
+            ],
+            "ambulances": []
+        }
+        for hospital_id in hospital_ids
+    }
+
+    for row in db.query(models.DiagnosticCentre).filter(
+        models.DiagnosticCentre.affiliatedHospital.in_(hospital_ids)
+    ).order_by(models.DiagnosticCentre.rating.desc().nullslast()).all():
+        network[row.affiliatedHospital]["diagnosticCentres"].append(
+            {"id": row.id, "name": row.name, "location": row.location, "rating": row.rating}
+        )
+
+    for row in db.query(models.Ambulance).filter(
+        models.Ambulance.hospitalId.in_(hospital_ids)
+    ).all():
+        network[row.hospitalId]["ambulances"].append({
+            "ambulanceId": row.ambulanceId,
+            "vehicleNumber": row.vehicleNumber,
+            "driverName": row.driverName,
+            "location": row.location,
+            "available": row.available
+        })
+
+    return network
+
+@router.get("/network")
+def get_hospital_networks(hospital_ids: List[UUID] = Query(...), db: Session = Depends(get_db)):
+    """
+    Batch mode of the hospital network lookup.
+    Used by regional views that render many hospitals at once.
+    """
+    hospital_ids = list(dict.fromkeys(hospital_ids))
+    if len(hospital_ids) > MAX_NETWORK_BATCH:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_NETWORK_BATCH} hospitals per request")
+    return list(_load_network(db, hospital_ids).values())
+
+@router.get("/network/{hospital_id}")
+def get_hospital_network(hospital_id: UUID, db: Session = Depends(get_db)):
+    """
+    Analytics: A hospital's affiliated pharmacies, ranked diagnostic centres,
+    departments and ambulances in one response.
+    """
+    return _load_network(db, [hospital_id])[hospital_id]
 
 @router.get("/{hospital_id}", response_model=schemas.HospitalRead)
-def get_hospital(hospital_id: UUID, db: Session = Depends(get_db)):
+def get_hospital(
+    hospital_id: UUID, fields = Depends(field_projection(schemas.HospitalRead)), db: Session = Depends(get_db)
+):
     """Fetches details for one hospital."""
-    hospital = db.query(models.Hospital).filter(models.Hospital.hospitalId == hospital_id).first()
+    refdata.ensure_fresh(db)
+    hospital = refdata.hospital(hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
-    return hospital
+    return project(schemas.HospitalRead, hospital, fields)
 
 @router.get("/capacity/occupancy/{hospital_id}")
 def get_bed_occupancy_rate(hospital_id: UUID, db: Session = Depends(get_db)):
@@ -28,12 +106,7 @@ def get_bed_occupancy_rate(hospital_id: UUID, db: Session = Depends(get_db)):
     Analytics: Calculates real-time bed occupancy percentage.
     Used for the 'Capacity Gauge' on the main dashboard.
     """
-    total = db.query(models.Bed).filter(models.Bed.hospitalId == hospital_id).count()
-    
-    occupied = db.query(models.Bed).filter(
-        models.Bed.hospitalId == hospital_id, 
-        models.Bed.status == "OCCUPIED"
-    ).count()
+    total, occupied = queries.bed_counts(db, hospital_id)
     
     # Formula: (Occupied / Total) * 100
     rate = (occupied / total * 100) if total > 0 else 0
@@ -51,14 +124,8 @@ def get_department_service_count(hospital_id: UUID, db: Session = Depends(get_db
     Analytics: Counts treatments per department for a specific hospital.
     Used for 'Service Capability' charts on the dashboard.
     """
-    results = db.query(
-        models.Department.deptName,
-        func.count(models.DepartmentTreatment.treatmentName).label("total_services")
-    ).join(models.DepartmentTreatment).filter(
-        models.Department.hospitalId == hospital_id
-    ).group_by(models.Department.deptName).all()
-    
-    return {row.deptName: row.total_services for row in results}
+    refdata.ensure_fresh(db)
+    return refdata.department_service_counts(hospital_id)
 
 @router.get("/departments/diversity/{hospital_id}")
 def get_department_service_diversity(hospital_id: UUID, db: Session = Depends(get_db)):
@@ -66,14 +133,8 @@ def get_department_service_diversity(hospital_id: UUID, db: Session = Depends(ge
     Analytics: Counts how many unique treatments each department offers.
     Used for a 'Departmental Strength' Bar Chart.
     """
-    results = db.query(
-        models.Department.deptName,
-        func.count(models.DepartmentTreatment.treatmentName).label("service_count")
-    ).join(models.DepartmentTreatment).filter(
-        models.Department.hospitalId == hospital_id
-    ).group_by(models.Department.deptName).all()
-    
-    return {row.deptName: row.service_count for row in results}
+    refdata.ensure_fresh(db)
+    return refdata.department_service_counts(hospital_id)
 
 @router.get("/emergency/readiness/{hospital_id}")
 def get_ambulance_readiness(hospital_id: UUID, db: Session = Depends(get_db)):
@@ -81,11 +142,7 @@ def get_ambulance_readiness(hospital_id: UUID, db: Session = Depends(get_db)):
     Analytics: Calculates the percentage of ambulances currently available.
     Used for an 'Emergency Status' indicator on the dashboard.
     """
-    total = db.query(models.Ambulance).filter(models.Ambulance.hospitalId == hospital_id).count()
-    available_count = db.query(models.Ambulance).filter(
-        models.Ambulance.hospitalId == hospital_id, 
-        models.Ambulance.available == True
-    ).count()
+    total, available_count = queries.ambulance_counts(db, hospital_id)
     
     readiness_rate = (available_count / total * 100) if total > 0 else 0
     return {
@@ -93,4 +150,4 @@ def get_ambulance_readiness(hospital_id: UUID, db: Session = Depends(get_db)):
         "totalAmbulances": total,
         "availableCount": available_count,
         "readinessPercentage": f"{readiness_rate:.2f}%"
-    }
\ No newline at end of file
+    }
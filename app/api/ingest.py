@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..ingest import DATASETS, MAX_BATCH_BYTES, IngestError, ingest_batch, parse_batch
+
+router = APIRouter()
+
+@router.post("/{dataset}")
+async def ingest_dataset(dataset: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Bulk load: accepts an NDJSON (application/x-ndjson) or CSV (text/csv) batch for
+    invoices, invoice_items, lab_results or treatment_records and loads it with COPY.
+    Idempotent on primary key (existing keys are reported as skipped, not updated);
+    freshness watermarks move in the same transaction.
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset. Use one of: {', '.join(DATASETS)}")
+    content_type = request.headers.get("content-type", "")
+    fmt = "csv" if "csv" in content_type else "ndjson"
+
+    too_large = HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_BYTES} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_BATCH_BYTES:
+        raise too_large
+    # Streamed with a running total, so a missing or false Content-Length can't bypass the cap
+    chunks, received = [], 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_BATCH_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    body = b"".join(chunks)
+    try:
+        rows = await run_in_threadpool(parse_batch, dataset, body, fmt)
+        summary = await run_in_threadpool(ingest_batch, db, rows)
+    except IngestError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"dataset": dataset, "format": fmt, "tables": summary}
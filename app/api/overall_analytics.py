@@ -1,58 +1,65 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 import app.models as models
+from .. import queries
+from ..approx import distinct_patients, exact_distinct_patients, table_row_estimate, value_fraction
 from ..database import get_db
+from ..snapshot import get_store, snapshot_backend
 from datetime import datetime, timedelta
 
 
 router = APIRouter()
 
 @router.get("/executive-summary/{hospital_id}")
-def get_master_executive_summary(hospital_id: UUID, db: Session = Depends(get_db)):
+def get_master_executive_summary(
+    hospital_id: UUID,
+    mode: str = Query("exact", pattern="^(exact|approx)$"),
+    db: Session = Depends(get_db)
+):
     """
     INTELLIGENCE LAYER: This is the primary endpoint for the Arogya Mitra Admin Dashboard.
     It synthesizes 5 key business pillars into one JSON response.
+    mode=approx answers the whole-table clinical KPIs from planner statistics instead of
+    counting treatment_records; errorBounds holds each figure's bound (0 when exact).
     """
-    
+    error_bounds = {"totalCases": 0, "successRate": 0.0}
+
     # Service 1: Financial Health (Total Revenue)
-    revenue = db.query(func.sum(models.Invoice.totalAmount)).filter(
-        models.Invoice.hospitalId == hospital_id
-    ).scalar() or 0
+    revenue = queries.total_revenue(db, hospital_id)
 
     # Service 2: Clinical Quality (Success Rate)
     # Count only records that have an outcome status
-    total_clinical = db.query(models.TreatmentRecord).count()
-    success_clinical = db.query(models.TreatmentRecord).filter(
-        models.TreatmentRecord.outcome == "SUCCESS"
-    ).count()
-    success_rate = (success_clinical / total_clinical * 100) if total_clinical > 0 else 0
+    estimate = table_row_estimate(db, "treatment_records") if mode == "approx" else None
+    fraction = value_fraction(db, "treatment_records", "outcome", "SUCCESS", *estimate) if estimate else None
+    if fraction is not None:
+        total_clinical, error_bounds["totalCases"] = estimate
+        success_rate = fraction[0] * 100
+        error_bounds["successRate"] = round(fraction[1] * 100, 2)
+    else:
+        # Exact requested, or statistics not available yet (never analyzed / SUCCESS not a common value)
+        mode = "exact"
+        total_clinical, success_clinical = queries.treatment_outcome_counts(db)
+        success_rate = (success_clinical / total_clinical * 100) if total_clinical > 0 else 0
 
     # Service 3: Infrastructure Capacity (Bed Occupancy)
-    total_beds = db.query(models.Bed).filter(models.Bed.hospitalId == hospital_id).count()
-    occupied = db.query(models.Bed).filter(
-        models.Bed.hospitalId == hospital_id, 
-        models.Bed.status == "OCCUPIED"
-    ).count()
+    total_beds, occupied = queries.bed_counts(db, hospital_id)
     occupancy = (occupied / total_beds * 100) if total_beds > 0 else 0
 
     # Service 4: Operational Load (Pending Appointments)
-    pending_appts = db.query(models.Appointment).filter(
-        models.Appointment.hospitalId == hospital_id,
-        models.Appointment.status == "PENDING"
-    ).count()
+    pending_appts = queries.appointment_count_by_status(db, hospital_id, "PENDING")
 
     # Service 5: Emergency Readiness (Ambulances)
-    available_ambulances = db.query(models.Ambulance).filter(
-        models.Ambulance.hospitalId == hospital_id,
-        models.Ambulance.available == True
-    ).count()
+    _, available_ambulances = queries.ambulance_counts(db, hospital_id)
 
     return {
         "hospitalId": hospital_id,
         "generatedAt": datetime.now(),
+        "mode": mode,
+        "errorBounds": error_bounds,
         "dashboard_stats": {
             "financial": {"totalRevenue": round(revenue, 2), "unit": "INR"},
             "clinical": {"successRate": f"{success_rate:.1f}%", "totalCases": total_clinical},
@@ -62,25 +69,71 @@ def get_master_executive_summary(hospital_id: UUID, db: Session = Depends(get_db
     }
 
 @router.get("/trends/patient-flow/{hospital_id}")
-def get_patient_flow_trends(hospital_id: UUID, db: Session = Depends(get_db)):
+def get_patient_flow_trends(
+    hospital_id: UUID,
+    days: int = Query(7, ge=1, le=366),
+    db: Session = Depends(get_db),
+    snapshot = Depends(snapshot_backend)
+):
+    """Appointments per day over the last `days` days (today included)."""
+    since = datetime.now().date() - timedelta(days=days - 1)
+    if snapshot is not None:
+        return snapshot.patient_flow(hospital_id, since)
+
+    # The lower bound on the partition key keeps the scan to the last month or two of partitions
     trends = db.query(
         models.Appointment.date.label("date"),
         func.count(models.Appointment.appointmentId).label("patient_count")
     ).filter(
-        models.Appointment.hospitalId == hospital_id
-    ).group_by(models.Appointment.date).order_by(models.Appointment.date.desc()).limit(7).all()
+        models.Appointment.hospitalId == hospital_id,
+        models.Appointment.date >= since,
+        models.Appointment.date <= datetime.now().date()
+    ).group_by(models.Appointment.date).order_by(models.Appointment.date.desc()).all()
 
     return [{"date": str(t.date), "count": t.patient_count} for t in trends]
 
+@router.get("/patients/distinct/{hospital_id}")
+def get_distinct_patients(
+    hospital_id: UUID,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    mode: str = Query("approx", pattern="^(exact|approx)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Analytics: Distinct patients with appointments per month, and over the whole range.
+    The range is widened to whole calendar months and defaults to the last 12.
+    mode=approx merges per-month HyperLogLog sketches; errorBound is the ~95% bound.
+    Months older than the sketches (BACKFILL_MONTHS) are counted exactly even then.
+    """
+    if end is None or end.day > 1:
+        # Exclusive bound: the first day of the month after `end` (this month by default)
+        end = end or datetime.now().date()
+        end = date(end.year + end.month // 12, end.month % 12 + 1, 1)
+    start = (start or date(end.year - 1, end.month, 1)).replace(day=1)
+    if start >= end:
+        raise HTTPException(status_code=422, detail="start must be before end")
+
+    if mode == "approx":
+        distinct_patients.refresh(db)
+        result = distinct_patients.count(db, hospital_id, start, end)
+    else:
+        result = exact_distinct_patients(db, hospital_id, start, end)
+    return {"hospitalId": hospital_id, "mode": mode, "start": start, "end": end, **result}
+
 @router.get("/health/watchdog")
 def system_health_watchdog(db: Session = Depends(get_db)):
     """
     Monitors data integrity and freshness across the Arogya Mitra hub.
     Flags services as 'old data' if no data has been synced in 24 hours.
     """
-    def check_freshness(model, timestamp_col):
+    # Bulk loads record their last run in etl_watermarks
+    ingests = {row.pipeline: row.updatedAt for row in db.query(models.EtlWatermark).all()}
+
+    def check_freshness(model, timestamp_col, pipeline=None):
         # Find the most recent update in the table
         latest_record = db.query(func.max(timestamp_col)).scalar()
+        last_ingest = ingests.get(pipeline)
         
         if not latest_record:
             return {"status": "EMPTY", "last_sync": None}
@@ -89,15 +142,30 @@ def system_health_watchdog(db: Session = Depends(get_db)):
         is_stale = datetime.now() - latest_record > timedelta(hours=24)
         return {
             "status": "STALE" if is_stale else "HEALTHY",
-            "last_sync": latest_record.strftime("%Y-%m-%d %H:%M:%S")
+            "last_sync": latest_record.strftime("%Y-%m-%d %H:%M:%S"),
+            "last_ingest": last_ingest.strftime("%Y-%m-%d %H:%M:%S") if last_ingest else None
         }
 
     return {
         "services": {
             "pharmacy_pipeline": check_freshness(models.Pharmacy, models.Pharmacy.createdAt),
-            "billing_pipeline": check_freshness(models.Invoice, models.Invoice.createdAt),
-            "clinical_pipeline": check_freshness(models.TreatmentRecord, models.TreatmentRecord.performedAt),
+            "billing_pipeline": check_freshness(models.Invoice, models.Invoice.createdAt, "billing_pipeline"),
+            "clinical_pipeline": check_freshness(models.TreatmentRecord, models.TreatmentRecord.performedAt, "clinical_pipeline"),
+            "diagnostics_pipeline": check_freshness(models.LabResult, models.LabResult.uploadedAt, "diagnostics_pipeline"),
             "appointment_sync": check_freshness(models.Appointment, models.Appointment.createdAt)
         },
         "system_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
\ No newline at end of file
+    }
+
+@router.post("/snapshot/refresh")
+def refresh_analytics_snapshot(request: Request, db: Session = Depends(get_db)):
+    """
+    Syncs the local DuckDB snapshot used by routes called with ?backend=snapshot.
+    Incremental for tables with a timestamp column.
+    """
+    settings = request.app.state.settings
+    try:
+        store = get_store(settings.snapshot_path)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    return {"path": settings.snapshot_path, "rowsCopied": store.refresh(db)}
@@ -4,19 +4,50 @@ from typing import List
 from uuid import UUID
 import app.models as models
 import app.schemas as schemas
+from ..cohort import DIMENSIONS, engine as cohort_engine
 from ..database import get_db
+from ..projection import field_projection, load_options, project
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.PatientRead])
-def get_all_patients(db: Session = Depends(get_db)):
-    """Fetches all registered patients from Supabase."""
-    return db.query(models.Patient).all()
+def get_all_patients(fields = Depends(field_projection(schemas.PatientRead)), db: Session = Depends(get_db)):
+    """Fetches all registered patients from Supabase. ?fields= narrows both the SELECT and the response."""
+    patients = db.query(models.Patient).options(*load_options(models.Patient, fields)).all()
+    return project(schemas.PatientRead, patients, fields)
+
+@router.post("/cohort")
+def query_patient_cohort(query: schemas.CohortQuery, db: Session = Depends(get_db)):
+    """
+    Analytics: Ad-hoc demographic breakdowns (age band, gender, blood group,
+    active flag, registration month, hospital) from the in-memory column snapshot.
+    """
+    invalid = [dim for dim in query.groupBy if dim not in DIMENSIONS]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Unsupported groupBy: {', '.join(invalid)}")
+
+    cohort_engine.refresh(db)
+    return cohort_engine.query(
+        hospital_ids=query.hospitalIds,
+        genders=query.genders,
+        blood_groups=query.bloodGroups,
+        active=query.active,
+        age_min=query.ageMin,
+        age_max=query.ageMax,
+        registered_from=query.registeredFrom,
+        registered_to=query.registeredTo,
+        group_by=list(dict.fromkeys(query.groupBy)),
+        age_band_width=query.ageBandWidth
+    )
 
 @router.get("/{patient_id}", response_model=schemas.PatientRead)
-def get_patient_by_id(patient_id: UUID, db: Session = Depends(get_db)):
+def get_patient_by_id(
+    patient_id: UUID, fields = Depends(field_projection(schemas.PatientRead)), db: Session = Depends(get_db)
+):
     """Fetches a specific patient record by UUID."""
-    patient = db.query(models.Patient).filter(models.Patient.patientId == patient_id).first()
+    patient = db.query(models.Patient).options(*load_options(models.Patient, fields)).filter(
+        models.Patient.patientId == patient_id
+    ).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    return patient
\ No newline at end of file
+    return project(schemas.PatientRead, patient, fields)
\ No newline at end of file
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from uuid import UUID
 from typing import List
-import app.models as models
 import app.schemas as schemas
+from .. import queries
 from ..database import get_db
+from ..projection import field_projection, project
+from ..refdata import store as refdata
 
 # The single router for all Pharmacy-related analytics
 router = APIRouter()
@@ -13,23 +14,29 @@ router = APIRouter()
 # --- MEDICINE CATALOG ANALYTICS ---
 
 @router.get("/medicines", response_model=List[schemas.MedicineRead])
-def get_all_medicines(db: Session = Depends(get_db)):
-    """Returns the full medicine catalog."""
-    return db.query(models.Medicine).all()
+def get_all_medicines(fields = Depends(field_projection(schemas.MedicineRead)), db: Session = Depends(get_db)):
+    """Returns the full medicine catalog (served from the in-memory reference data); ?fields= narrows each entry."""
+    refdata.ensure_fresh(db)
+    return project(schemas.MedicineRead, refdata.medicines, fields)
+
+@router.get("/medicines/{medicine_id}", response_model=schemas.MedicineRead)
+def get_medicine(
+    medicine_id: UUID, fields = Depends(field_projection(schemas.MedicineRead)), db: Session = Depends(get_db)
+):
+    """Returns one catalog entry."""
+    refdata.ensure_fresh(db)
+    medicine = refdata.medicines_by_id.get(medicine_id)
+    if not medicine:
+        raise HTTPException(status_code=404, detail="Medicine not found")
+    return project(schemas.MedicineRead, medicine, fields)
 
 @router.get("/analytics/manufacturers")
 def get_manufacturer_distribution(db: Session = Depends(get_db)):
     """Dashboard KPI: Shows brand diversity in the pharmacy."""
-    results = db.query(
-        models.Medicine.manufacturer,
-        func.count(models.Medicine.id).label("count")
-    ).group_by(models.Medicine.manufacturer).all()
-    return {row.manufacturer: row.count for row in results if row.manufacturer}
+    return queries.manufacturer_distribution(db)
 
 # --- PHARMACY BRANCH ANALYTICS ---
 @router.get("/branches/{hospital_id}")
 def get_hospital_pharmacies(hospital_id: UUID, db: Session = Depends(get_db)):
-    hospital_id_str = str(hospital_id)
-    return db.query(models.Pharmacy).filter(
-        models.Pharmacy.affiliatedHospitalId == hospital_id_str
-    ).all()
\ No newline at end of file
+    refdata.ensure_fresh(db)
+    return refdata.hospital_pharmacies(hospital_id)
\ No newline at end of file
@@ -0,0 +1,151 @@
+import re
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, literal_column, or_
+from typing import Optional
+from uuid import UUID
+import app.models as models
+from ..database import get_db
+
+router = APIRouter()
+
+# Hard ceiling on rows returned by any typeahead call
+MAX_RESULTS = 50
+
+def _normalize(q: str) -> str:
+    return " ".join(q.lower().split())
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _name_match(column, q: str):
+    """
+    Prefix or trigram match on lower(column), served by the varchar_pattern_ops
+    and gin_trgm_ops expression indexes in migrations/002_search_indexes.sql.
+    Returns (filter, rank) where rank sorts prefix hits first, then by similarity.
+    """
+    lowered = func.lower(column)
+    prefix = lowered.like(f"{_escape_like(q)}%", escape="\\")
+    if len(q) < 3:
+        # Too short for trigrams to be selective
+        return prefix, case((prefix, 1.0), else_=0.0)
+    condition = or_(prefix, lowered.op("%")(q))
+    rank = case((prefix, 1.0), else_=0.0) + func.similarity(lowered, q)
+    return condition, rank
+
+@router.get("/patients")
+def search_patients(
+    q: str = Query(..., min_length=1, max_length=100),
+    hospital_id: Optional[UUID] = None,
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_db)
+):
+    """
+    Typeahead: Finds patients by name or phone number prefix.
+    Used by front-desk search boxes instead of downloading the patient list.
+    """
+    term = _normalize(q)
+    digits = re.sub(r"[\s\-+()]", "", term)
+    if len(digits) >= 3 and digits.isdigit():
+        # Stored numbers keep their punctuation; match on the digits only, with the pattern
+        # inlined so the expression is the one indexed in migrations/002
+        phone_digits = func.regexp_replace(
+            models.Patient.phoneNumber, literal_column(r"'\D'"), literal_column("''"), literal_column("'g'")
+        )
+        condition = phone_digits.like(f"{digits}%")
+        rank = func.length(phone_digits) * -1.0
+    else:
+        condition, rank = _name_match(models.Patient.fullName, term)
+
+    query = db.query(
+        models.Patient.patientId,
+        models.Patient.hospitalId,
+        models.Patient.fullName,
+        models.Patient.phoneNumber,
+        rank.label("score")
+    ).filter(condition)
+    if hospital_id:
+        query = query.filter(models.Patient.hospitalId == hospital_id)
+
+    results = query.order_by(rank.desc(), models.Patient.fullName).limit(limit).all()
+    return [
+        {
+            "patientId": row.patientId,
+            "hospitalId": row.hospitalId,
+            "fullName": row.fullName,
+            "phoneNumber": row.phoneNumber,
+            "score": round(float(row.score), 3)
+        }
+        for row in results
+    ]
+
+@router.get("/medicines")
+def search_medicines(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_db)
+):
+    """
+    Typeahead: Finds medicines by name or manufacturer.
+    Name matches rank above manufacturer-only matches.
+    """
+    term = _normalize(q)
+    name_condition, name_rank = _name_match(models.Medicine.name, term)
+    maker_condition, maker_rank = _name_match(models.Medicine.manufacturer, term)
+    rank = func.greatest(name_rank, maker_rank * 0.5)
+
+    results = db.query(
+        models.Medicine.id,
+        models.Medicine.name,
+        models.Medicine.strength,
+        models.Medicine.dosageForm,
+        models.Medicine.manufacturer,
+        rank.label("score")
+    ).filter(
+        or_(name_condition, maker_condition)
+    ).order_by(rank.desc(), models.Medicine.name).limit(limit).all()
+
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "strength": row.strength,
+            "dosageForm": row.dosageForm,
+            "manufacturer": row.manufacturer,
+            "score": round(float(row.score), 3)
+        }
+        for row in results
+    ]
+
+@router.get("/staff")
+def search_staff(
+    q: str = Query(..., min_length=1, max_length=100),
+    hospital_id: Optional[UUID] = None,
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_db)
+):
+    """Typeahead: Finds staff members by name, optionally within one hospital."""
+    condition, rank = _name_match(models.Staff.full_name, _normalize(q))
+    query = db.query(
+        models.Staff.staff_id,
+        models.Staff.hospital_id,
+        models.Staff.full_name,
+        models.Staff.role,
+        models.Staff.status,
+        rank.label("score")
+    ).filter(condition)
+    if hospital_id:
+        query = query.filter(models.Staff.hospital_id == hospital_id)
+
+    results = query.order_by(rank.desc(), models.Staff.full_name).limit(limit).all()
+    return [
+        {
+            "staff_id": row.staff_id,
+            "hospital_id": row.hospital_id,
+            "full_name": row.full_name,
+            "role": row.role,
+            "status": row.status,
+            "score": round(float(row.score), 3)
+        }
+        for row in results
+    ]
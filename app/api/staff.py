@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from uuid import UUID
-from datetime import date as date_obj
+from typing import List, Optional
+from datetime import date as date_obj, timedelta
 import app.models as models
 import app.schemas as schemas
 from ..database import get_db
+from ..utilization import engine as utilization_engine
 
 router = APIRouter()
 
@@ -85,6 +87,34 @@ def get_daily_readiness(hospital_id: UUID, db: Session = Depends(get_db)):
     rate = (available / total_docs * 100) if total_docs > 0 else 0
     return {"date": today, "available_count": available, "readiness_rate": f"{rate:.2f}%"}
 
+@router.get("/availability/utilization")
+def get_slot_utilization(
+    hospital_ids: Optional[List[UUID]] = Query(None),
+    start: Optional[date_obj] = None,
+    end: Optional[date_obj] = None,
+    group_by: List[str] = Query(["specialty"]),
+    db: Session = Depends(get_db)
+):
+    """
+    Analytics: Booked vs. available doctor minutes from parsed slot bitmaps.
+    Used for 'Slot Utilization' charts by specialty, hospital and day.
+    """
+    end = end or date_obj.today()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must be on or before end")
+    if (end - start).days > 366:
+        raise HTTPException(status_code=422, detail="Range is limited to one year")
+    invalid = [dim for dim in group_by if dim not in ("specialty", "hospital", "day")]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Unsupported group_by: {', '.join(invalid)}")
+
+    return {
+        "start": start,
+        "end": end,
+        "groups": utilization_engine.utilization(db, start, end, group_by, hospital_ids)
+    }
+
 # ---  QUALITY & FEEDBACK ANALYTICS ---
 
 @router.get("/doctors/top-rated/{hospital_id}")
@@ -0,0 +1,287 @@
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+from sqlalchemy import distinct, func, select, text, tuple_
+from sqlalchemy.orm import Session
+import app.models as models
+from .sketches import HyperLogLog
+from .watermarks import get_watermark, set_watermark
+
+# Error bounds are reported at ~95% confidence
+Z_95 = 1.96
+# Rows ANALYZE samples per unit of statistics target
+ANALYZE_ROWS_PER_TARGET = 300
+
+# --- Planner statistics ---
+
+def table_row_estimate(db: Session, table: str) -> Optional[Tuple[int, int]]:
+    """
+    (estimated rows, error bound) from the planner's pg_class.reltuples, summed over partitions.
+    The bound is the number of rows modified since the last ANALYZE (n_mod_since_analyze).
+    None when the table has never been analyzed or the database is not Postgres.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    row = db.execute(text(
+        "SELECT sum(greatest(c.reltuples, 0)), coalesce(sum(s.n_mod_since_analyze), 0), bool_or(c.reltuples < 0) "
+        "FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid "
+        "WHERE c.relkind = 'r' AND (c.oid = to_regclass(:table) "
+        "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:table)))"
+    ), {"table": table}).first()
+    if row is None or row[0] is None or row[2]:
+        return None
+    return int(row[0]), int(row[1])
+
+def value_fraction(db: Session, table: str, column: str, value: str, rows: int, modified: int) -> Optional[Tuple[float, float]]:
+    """
+    (fraction of rows where column = value, error bound) from pg_stats.most_common_freqs.
+    The bound combines ANALYZE's sampling error with the share of rows modified since.
+    None when the value is not among the column's most common values.
+    """
+    stats = db.execute(text(
+        "SELECT most_common_vals::text::text[], most_common_freqs, "
+        "current_setting('default_statistics_target')::int "
+        "FROM pg_stats WHERE schemaname = current_schema() AND tablename = :table AND attname = :column "
+        "ORDER BY inherited DESC LIMIT 1"
+    ), {"table": table, "column": column}).first()
+    if stats is None or not stats[0] or value not in stats[0]:
+        return None
+    fraction = float(stats[1][stats[0].index(value)])
+    sample = max(min(ANALYZE_ROWS_PER_TARGET * stats[2], rows), 1)
+    bound = Z_95 * math.sqrt(fraction * (1 - fraction) / sample) + (modified / rows if rows else 0.0)
+    return fraction, min(bound, 1.0)
+
+# --- Distinct patients per hospital and month ---
+
+PIPELINE = "patient_sketches"
+INCREMENTAL_REFRESH_SECONDS = 60
+# Months of appointments read when the sketches are first filled or rebuilt
+BACKFILL_MONTHS = 24
+CHUNK_SIZE = 20_000
+# Serializes top-ups across instances (pg_advisory_xact_lock key)
+SKETCH_LOCK_KEY = 0x686c6c73
+
+Key = Tuple[UUID, int]
+
+def _month(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+def _month_date(month: int) -> date:
+    return date(month // 12, month % 12 + 1, 1)
+
+def _months(start: date, end: date) -> range:
+    """Month numbers overlapping [start, end)."""
+    return range(_month(start), _month(end - timedelta(days=1)) + 1)
+
+def _month_label(month: int) -> str:
+    return f"{month // 12:04d}-{month % 12 + 1:02d}"
+
+def sketch_horizon(today: Optional[date] = None) -> date:
+    """First day of the oldest month with a sketch: BACKFILL_MONTHS months, counting the current one."""
+    return _month_date(_month(today or date.today()) - BACKFILL_MONTHS + 1)
+
+def _in_range(hospital_id: UUID, start: date, end: date) -> list:
+    return [
+        models.Appointment.hospitalId == hospital_id,
+        models.Appointment.date >= start,
+        models.Appointment.date < end
+    ]
+
+def _exact_per_month(db: Session, hospital_id: UUID, start: date, end: date) -> Dict[int, int]:
+    month = func.date_trunc("month", models.Appointment.date).label("month")
+    return {
+        _month(row.month): row.patients
+        for row in db.query(month, func.count(distinct(models.Appointment.patientId)).label("patients"))
+        .filter(*_in_range(hospital_id, start, end)).group_by(month).all()
+    }
+
+def _patient_ids(db: Session, hospital_id: UUID, start: date, end: date):
+    stmt = select(distinct(models.Appointment.patientId)).where(*_in_range(hospital_id, start, end))
+    return db.execute(stmt.execution_options(yield_per=CHUNK_SIZE)).scalars()
+
+class DistinctPatientSketches:
+    """
+    One HyperLogLog of patient ids per (hospital, appointment month), persisted in
+    patient_sketches and topped up from appointments created since the watermark.
+    Sketches merge, so any range of months (or set of hospitals) is answered without
+    rescanning appointments. Only the last BACKFILL_MONTHS months are sketched; older
+    months are counted exactly. Deleted appointments stay counted until rebuild().
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._sketches: Dict[Key, HyperLogLog] = {}
+        # Watermark the in-memory sketches reflect; None until loaded from the table
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._refreshed_at = 0.0
+
+    def _lock_table(self, db: Session):
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SKETCH_LOCK_KEY})
+
+    def _read_saved(self, db: Session) -> Dict[Key, HyperLogLog]:
+        return {
+            (row.hospitalId, _month(row.month)): HyperLogLog.from_bytes(row.registers)
+            for row in db.query(models.PatientSketch).all()
+        }
+
+    def _scan(
+        self, db: Session, since: Optional[datetime], sketches: Dict[Key, HyperLogLog]
+    ) -> Tuple[int, Optional[datetime], Set[Key]]:
+        """
+        Adds appointments created since `since` (all of them when None) and dated within the
+        sketch horizon to `sketches`, copying each sketch before its first change so readers of the old
+        dict are unaffected. Returns (rows read, latest created_at, changed keys).
+        """
+        stmt = select(
+            models.Appointment.hospitalId,
+            models.Appointment.date,
+            models.Appointment.patientId,
+            models.Appointment.createdAt
+        ).where(models.Appointment.patientId.isnot(None), models.Appointment.date >= sketch_horizon())
+        if since is not None:
+            # Rows at the watermark are re-read; adding a patient twice doesn't change a sketch
+            stmt = stmt.where(models.Appointment.createdAt >= since)
+        loaded, latest, changed = 0, since, set()
+        for chunk in db.execute(stmt.execution_options(yield_per=CHUNK_SIZE)).partitions(CHUNK_SIZE):
+            for hospital_id, day, patient_id, created_at in chunk:
+                if hospital_id is None or day is None:
+                    continue
+                key = (hospital_id, _month(day))
+                if key not in changed:
+                    sketch = sketches.get(key)
+                    sketches[key] = sketch.copy() if sketch is not None else HyperLogLog(self.precision)
+                    changed.add(key)
+                sketches[key].add(patient_id)
+                if created_at and (latest is None or created_at > latest):
+                    latest = created_at
+            loaded += len(chunk)
+        return loaded, latest, changed
+
+    def _save(self, db: Session, sketches: Dict[Key, HyperLogLog], keys: Set[Key]):
+        if not keys:
+            return
+        table = models.PatientSketch.__table__
+        db.execute(table.delete().where(
+            tuple_(table.c.hospital_id, table.c.month).in_([(hospital_id, _month_date(month)) for hospital_id, month in keys])
+        ))
+        now = datetime.now()
+        db.execute(table.insert(), [
+            {"hospital_id": hospital_id, "month": _month_date(month),
+             "registers": sketches[(hospital_id, month)].to_bytes(), "updated_at": now}
+            for hospital_id, month in keys
+        ])
+
+    def refresh(self, db: Session, force: bool = False) -> int:
+        """
+        At most once a minute (or when forced): loads the saved sketches if another instance
+        moved the watermark, adds appointments created since it, and saves the changed sketches.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded and not force and now - self._refreshed_at <= INCREMENTAL_REFRESH_SECONDS:
+                return 0
+            started = datetime.now()
+            try:
+                self._lock_table(db)
+                watermark = get_watermark(db, PIPELINE)
+                saved = self._sketches if self._loaded and watermark == self._watermark else self._read_saved(db)
+                # Built aside and swapped in, so queries keep reading the old sketches meanwhile
+                sketches = dict(saved)
+                loaded, latest, changed = self._scan(db, watermark, sketches)
+                self._save(db, sketches, changed)
+                # A first fill that found nothing still sets the watermark, so it isn't repeated
+                set_watermark(db, PIPELINE, latest or (started if watermark is None else None))
+                watermark = get_watermark(db, PIPELINE)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            self._sketches, self._watermark, self._loaded = sketches, watermark, True
+            self._refreshed_at = now
+            return loaded
+
+    def rebuild(self, db: Session) -> int:
+        """Refills the table from the last BACKFILL_MONTHS months of appointments, dropping older months."""
+        with self._lock:
+            started = datetime.now()
+            try:
+                self._lock_table(db)
+                sketches: Dict[Key, HyperLogLog] = {}
+                loaded, latest, changed = self._scan(db, None, sketches)
+                db.execute(models.PatientSketch.__table__.delete())
+                self._save(db, sketches, changed)
+                # set_watermark never rewinds, and a rebuild must restart from its own scan
+                row = db.get(models.EtlWatermark, PIPELINE) or models.EtlWatermark(pipeline=PIPELINE)
+                row.watermark, row.updatedAt = latest or started, datetime.now()
+                db.add(row)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            self._sketches, self._watermark, self._loaded = sketches, latest or started, True
+            self._refreshed_at = time.monotonic()
+            return loaded
+
+    def count(self, db: Session, hospital_id: UUID, start: date, end: date) -> Dict:
+        """
+        Distinct patients per month in [start, end) and over the whole range, with 95% error bounds.
+        Months before the sketch horizon are counted exactly (errorBound 0), and their patient
+        ids are added to the sketch behind the total.
+        """
+        sketches = self._sketches
+        total = HyperLogLog(self.precision)
+        error = Z_95 * total.relative_error
+        horizon = sketch_horizon()
+        exact = {}
+        if start < horizon:
+            old_end = min(end, horizon)
+            exact = _exact_per_month(db, hospital_id, start, old_end)
+            total.update(_patient_ids(db, hospital_id, start, old_end))
+        months = []
+        for month in _months(start, end):
+            if month < _month(horizon):
+                months.append({"month": _month_label(month), "distinctPatients": exact.get(month, 0), "errorBound": 0})
+                continue
+            sketch = sketches.get((hospital_id, month))
+            estimate = 0
+            if sketch is not None:
+                estimate = sketch.count()
+                total.merge(sketch)
+            months.append({
+                "month": _month_label(month), "distinctPatients": estimate, "errorBound": math.ceil(error * estimate)
+            })
+        estimate = total.count()
+        return {"months": months, "total": {"distinctPatients": estimate, "errorBound": math.ceil(error * estimate)}}
+
+distinct_patients = DistinctPatientSketches()
+
+def exact_distinct_patients(db: Session, hospital_id: UUID, start: date, end: date) -> Dict:
+    """Same shape as DistinctPatientSketches.count(), from count(DISTINCT patient_id); error bounds are 0."""
+    per_month = _exact_per_month(db, hospital_id, start, end)
+    total = db.query(func.count(distinct(models.Appointment.patientId))).filter(*_in_range(hospital_id, start, end)).scalar()
+    return {
+        "months": [
+            {"month": _month_label(key), "distinctPatients": per_month.get(key, 0), "errorBound": 0}
+            for key in _months(start, end)
+        ],
+        "total": {"distinctPatients": total or 0, "errorBound": 0}
+    }
+
+if __name__ == "__main__":
+    # Refill the sketches from scratch, e.g. after bulk deletes: python -m app.approx
+    from .config import Settings
+    from .database import SessionLocal, init_engine
+
+    settings = Settings.from_env()
+    init_engine(settings.database_url)
+    session = SessionLocal()
+    try:
+        print(distinct_patients.rebuild(session))
+    finally:
+        session.close()
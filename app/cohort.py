@@ -0,0 +1,251 @@
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import app.models as models
+
+DIMENSIONS = ["hospital", "age_band", "gender", "blood_group", "active", "registration_month"]
+INCREMENTAL_REFRESH_SECONDS = 60
+# Deletes and rows without updated_at are only picked up by a full rebuild
+FULL_RELOAD_SECONDS = 60 * 60
+CHUNK_SIZE = 20_000
+_EPOCH = date(1970, 1, 1)
+
+def _days(value: Optional[date]) -> int:
+    return (value - _EPOCH).days if value else -1
+
+def _month(value: Optional[datetime]) -> int:
+    return value.year * 12 + value.month - 1 if value else -1
+
+class _Dictionary:
+    """Maps categorical values to small integer codes (-1 for NULL)."""
+
+    def __init__(self):
+        self.values: List = []
+        self._codes: Dict = {}
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes(self, values) -> List[int]:
+        return [self._codes[value] for value in values if value in self._codes]
+
+    def copy(self) -> "_Dictionary":
+        clone = _Dictionary()
+        clone.values, clone._codes = list(self.values), dict(self._codes)
+        return clone
+
+COLUMNS = ("hospital", "gender", "blood_group", "active", "birth_day", "registration_month")
+
+class _Snapshot:
+    """
+    One version of the patients table: columns, dictionaries and row count together.
+    Built or copied by refresh() and published whole; never changed once queries can see it.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.row_of: Dict[UUID, int] = {}
+        self.hospitals, self.genders, self.blood_groups = _Dictionary(), _Dictionary(), _Dictionary()
+        self.hospital = np.empty(0, dtype=np.int32)
+        self.gender = np.empty(0, dtype=np.int16)
+        self.blood_group = np.empty(0, dtype=np.int16)
+        self.active = np.empty(0, dtype=np.int8)
+        self.birth_day = np.empty(0, dtype=np.int32)
+        self.registration_month = np.empty(0, dtype=np.int32)
+        self.watermark: Optional[datetime] = None
+
+    def copy(self) -> "_Snapshot":
+        clone = _Snapshot()
+        clone.size, clone.row_of, clone.watermark = self.size, dict(self.row_of), self.watermark
+        clone.hospitals, clone.genders, clone.blood_groups = (
+            self.hospitals.copy(), self.genders.copy(), self.blood_groups.copy()
+        )
+        for name in COLUMNS:
+            setattr(clone, name, getattr(self, name).copy())
+        return clone
+
+    def _reserve(self, rows: int):
+        capacity = len(self.hospital)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def apply(self, rows):
+        """Upserts one chunk of (patient_id, hospital_id, gender, blood_group, active, dob, created_at, updated_at)."""
+        positions, next_row = [], self.size
+        for row in rows:
+            position = self.row_of.get(row[0])
+            if position is None:
+                position = self.row_of[row[0]] = next_row
+                next_row += 1
+            positions.append(position)
+        self._reserve(next_row)
+
+        self.hospital[positions] = [self.hospitals.code(row[1]) for row in rows]
+        self.gender[positions] = [self.genders.code(row[2].strip().upper() if row[2] else None) for row in rows]
+        self.blood_group[positions] = [self.blood_groups.code(row[3].strip().upper() if row[3] else None) for row in rows]
+        self.active[positions] = [-1 if row[4] is None else int(row[4]) for row in rows]
+        self.birth_day[positions] = [_days(row[5]) for row in rows]
+        self.registration_month[positions] = [_month(row[6]) for row in rows]
+        self.size = len(self.row_of)
+
+        for row in rows:
+            if row[7] and (self.watermark is None or row[7] > self.watermark):
+                self.watermark = row[7]
+
+    def age_years(self, today: date) -> np.ndarray:
+        birth = self.birth_day[:self.size]
+        age = ((_days(today) - birth) / 365.2425).astype(np.int32)
+        return np.where(birth < 0, -1, age)
+
+class CohortEngine:
+    """
+    Columnar NumPy snapshot of the patients table for ad-hoc filter + group-by.
+    Categorical columns are dictionary-encoded; dates are stored as day/month numbers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot()
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+
+    @property
+    def size(self) -> int:
+        return self._snapshot.size
+
+    def _load(self, db: Session, base: _Snapshot, since: Optional[datetime]) -> Tuple[_Snapshot, int]:
+        """`base` plus the rows updated since `since`; `base` itself is returned when there are none."""
+        stmt = select(
+            models.Patient.patientId,
+            models.Patient.hospitalId,
+            models.Patient.gender,
+            models.Patient.bloodGroup,
+            models.Patient.active,
+            models.Patient.dateOfBirth,
+            models.Patient.createdAt,
+            models.Patient.updatedAt
+        )
+        if since is not None:
+            stmt = stmt.where(models.Patient.updatedAt >= since)
+        snapshot, loaded = None, 0
+        for chunk in db.execute(stmt.execution_options(yield_per=CHUNK_SIZE)).partitions(CHUNK_SIZE):
+            if snapshot is None:
+                # Copied on the first change, so queries keep reading `base` meanwhile
+                snapshot = base.copy()
+            snapshot.apply(chunk)
+            loaded += len(chunk)
+        return snapshot or base, loaded
+
+    def refresh(self, db: Session, force: bool = False) -> int:
+        """Rebuilds the snapshot when due, otherwise applies rows updated since the watermark."""
+        with self._lock:
+            now = time.monotonic()
+            if force or not self._reloaded_at or now - self._reloaded_at > FULL_RELOAD_SECONDS:
+                self._snapshot, loaded = self._load(db, _Snapshot(), None)
+                self._reloaded_at = self._refreshed_at = now
+                return loaded
+            if now - self._refreshed_at > INCREMENTAL_REFRESH_SECONDS:
+                self._snapshot, loaded = self._load(db, self._snapshot, self._snapshot.watermark)
+                self._refreshed_at = now
+                return loaded
+            return 0
+
+    # --- Querying ---
+
+    def query(
+        self,
+        hospital_ids: Optional[List[UUID]] = None,
+        genders: Optional[List[str]] = None,
+        blood_groups: Optional[List[str]] = None,
+        active: Optional[bool] = None,
+        age_min: Optional[int] = None,
+        age_max: Optional[int] = None,
+        registered_from: Optional[date] = None,
+        registered_to: Optional[date] = None,
+        group_by: Optional[List[str]] = None,
+        age_band_width: int = 10
+    ) -> Dict:
+        group_by = group_by or []
+        # One snapshot for the whole query: refresh() may publish a newer one meanwhile
+        snapshot = self._snapshot
+        size = snapshot.size
+        mask = np.ones(size, dtype=bool)
+        today = date.today()
+        age = snapshot.age_years(today) if (age_min is not None or age_max is not None or "age_band" in group_by) else None
+
+        if hospital_ids:
+            mask &= np.isin(snapshot.hospital[:size], snapshot.hospitals.codes(hospital_ids))
+        if genders:
+            mask &= np.isin(snapshot.gender[:size], snapshot.genders.codes([g.strip().upper() for g in genders]))
+        if blood_groups:
+            mask &= np.isin(snapshot.blood_group[:size], snapshot.blood_groups.codes([b.strip().upper() for b in blood_groups]))
+        if active is not None:
+            mask &= snapshot.active[:size] == int(active)
+        if age_min is not None:
+            mask &= age >= age_min
+        if age_max is not None:
+            mask &= (age >= 0) & (age <= age_max)
+        if registered_from is not None:
+            mask &= snapshot.registration_month[:size] >= _month(registered_from)
+        if registered_to is not None:
+            mask &= (snapshot.registration_month[:size] >= 0) & (snapshot.registration_month[:size] <= _month(registered_to))
+
+        total = int(mask.sum())
+        if not group_by:
+            return {"total": total, "groups": [], "snapshotRows": size}
+
+        # Each dimension is densified with np.unique and the codes are packed into one int64 key
+        dense_codes, distinct_values, decoders = [], [], []
+        for dim in group_by:
+            if dim == "hospital":
+                column, decode = snapshot.hospital[:size], lambda c: str(snapshot.hospitals.values[c])
+            elif dim == "gender":
+                column, decode = snapshot.gender[:size], lambda c: snapshot.genders.values[c]
+            elif dim == "blood_group":
+                column, decode = snapshot.blood_group[:size], lambda c: snapshot.blood_groups.values[c]
+            elif dim == "active":
+                column, decode = snapshot.active[:size], lambda c: bool(c)
+            elif dim == "age_band":
+                column = np.where(age >= 0, age // age_band_width, -1)
+                decode = lambda c: f"{c * age_band_width}-{c * age_band_width + age_band_width - 1}"
+            else:
+                column = snapshot.registration_month[:size]
+                decode = lambda c: f"{c // 12:04d}-{c % 12 + 1:02d}"
+            values, inverse = np.unique(column[mask], return_inverse=True)
+            dense_codes.append(inverse.astype(np.int64).ravel())
+            distinct_values.append(values.tolist())
+            decoders.append(decode)
+
+        key = np.zeros(total, dtype=np.int64)
+        for codes, values in zip(dense_codes, distinct_values):
+            key = key * len(values) + codes
+        unique, counts = np.unique(key, return_counts=True)
+
+        groups = []
+        for packed, count in zip(unique.tolist(), counts.tolist()):
+            group = {}
+            for dim, values, decode in reversed(list(zip(group_by, distinct_values, decoders))):
+                packed, code = divmod(packed, len(values))
+                group[dim] = decode(values[code]) if values[code] >= 0 else None
+            groups.append({dim: group[dim] for dim in group_by} | {"count": count})
+        groups.sort(key=lambda group: -group["count"])
+        return {"total": total, "groups": groups, "snapshotRows": size}
+
+engine = CohortEngine()
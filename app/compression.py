@@ -0,0 +1,155 @@
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import brotli
+except ImportError:  # optional encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional encoding
+    zstandard = None
+
+# Server preference when the client accepts several at the same q-value
+DEFAULT_ENCODINGS = ["zstd", "br", "gzip"]
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+def available_encodings(preferred: Sequence[str]) -> List[str]:
+    """`preferred` minus the encodings whose optional package is not installed."""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [name for name in preferred if installed.get(name)]
+
+def negotiate(accept_encoding: str, supported: Sequence[str]) -> Optional[str]:
+    """Picks the encoding with the highest q-value in Accept-Encoding, ties broken by `supported` order."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name] = quality
+    best, best_quality = None, 0.0
+    for name in supported:
+        quality = weights.get(name, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+class _Compressor:
+    """Incremental compressor with the same compress/flush shape for every encoding."""
+
+    def __init__(self, encoding: str, level: Optional[int]):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._impl = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+            self.compress = self._impl.compress
+        elif encoding == "br":
+            self._impl = brotli.Compressor(quality=5 if level is None else level)
+            self.compress = self._impl.process
+        else:
+            self._impl = zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+            self.compress = self._impl.compress
+
+    def flush(self) -> bytes:
+        """Emits everything compressed so far without ending the stream."""
+        if self.encoding == "gzip":
+            return self._impl.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._impl.flush()
+        return self._impl.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._impl.finish() if self.encoding == "br" else self._impl.flush()
+
+class _CompressingSender:
+    def __init__(self, send, encoding: str, minimum_size: int, level: Optional[int]):
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._level = level
+        self._start = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    def _compressible(self) -> bool:
+        headers = {key.lower(): value for key, value in self._start["headers"]}
+        if b"content-encoding" in headers or self._start["status"] in (204, 304):
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_start(self, compressed: bool):
+        if compressed:
+            headers = [(key, value) for key, value in self._start["headers"] if key.lower() != b"content-length"]
+            headers.append((b"content-encoding", self._encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            self._start["headers"] = headers
+        await self._send(self._start)
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether compressing is worthwhile
+            self._start = message
+            self._passthrough = not self._compressible()
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            if self._start is not None:
+                await self._send(self._start)
+                self._start = None
+            await self._send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self._compressor is None:
+            if not more_body and len(body) < self._minimum_size:
+                self._passthrough = True
+                await self._send_start(compressed=False)
+                self._start = None
+                await self._send(message)
+                return
+            self._compressor = _Compressor(self._encoding, self._level)
+            await self._send_start(compressed=True)
+            self._start = None
+
+        chunk = self._compressor.compress(body) if body else b""
+        # Streamed chunks are flushed so the client can decode them as they arrive
+        chunk += self._compressor.flush() if more_body else self._compressor.finish()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the best encoding the client accepts
+    (zstd, br or gzip). Bodies sent in one piece are only compressed above minimum_size;
+    streamed bodies are compressed chunk by chunk as they are produced.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        encodings: Sequence[str] = DEFAULT_ENCODINGS,
+        level: Optional[int] = None
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings)
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size, self.level))
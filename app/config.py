@@ -0,0 +1,103 @@
+import os
+from dataclasses import dataclass, field
+from typing import List, Mapping, Optional
+
+# Router groups that can be mounted: group -> (module under app.api, prefix, tag).
+# ENABLED_ROUTERS=all mounts every one of them except the OPT_IN_ROUTERS, which must be
+# listed by name (e.g. ENABLED_ROUTERS=all,ingest).
+ROUTER_GROUPS = {
+    "hospital": ("hospital", "/api/v1/hospitals", "Hospital Analytics"),
+    "patient": ("patient", "/api/v1/patients", "Patient Analytics"),
+    "appointment": ("appointment", "/api/v1/appointments", "Appointment Analytics"),
+    "staff": ("staff", "/api/v1/staff", "Staff Analytics"),
+    "billing": ("billing", "/api/v1/billings", "Billing Analytics"),
+    "clinical": ("clinical", "/api/v1/clinical", "Clinical Analytics"),
+    "diagnostics": ("diagnostics", "/api/v1/diagnostics", "Diagnostics Analytics"),
+    "medicine": ("medicine", "/api/v1/medicine", "Medicine Analytics"),
+    "pharmacy": ("pharmacy", "/api/v1/pharmacy", "Pharmacy Analytics"),
+    "overall_analytics": ("overall_analytics", "/api/v1/summary_analytics", "Overall Analytics"),
+    "distribution": ("distribution", "/api/v1/distributions", "Distribution Analytics"),
+    "search": ("search", "/api/v1/search", "Search"),
+    "ingest": ("ingest", "/api/v1/ingest", "Bulk Ingestion"),
+}
+
+# Write endpoints with no authentication of their own; never mounted by "all"
+OPT_IN_ROUTERS = {"ingest"}
+DEFAULT_ROUTERS = [name for name in ROUTER_GROUPS if name not in OPT_IN_ROUTERS]
+
+DEFAULT_CORS_ORIGINS = ["http://localhost:3000", "http://localhost:5173"]
+
+def _as_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _as_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+@dataclass(frozen=True)
+class Settings:
+    # Required: DATABASE_URL has no default so credentials never live in the code
+    database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    # Connections opened (and returned to the pool) during startup
+    warm_pool_connections: int = 2
+    warm_caches: bool = True
+    # The distinct-patient sketches load from patient_sketches on first use; this loads them at startup
+    warm_patient_sketches: bool = False
+    enabled_routers: List[str] = field(default_factory=lambda: list(DEFAULT_ROUTERS))
+    cors_origins: List[str] = field(default_factory=lambda: list(DEFAULT_CORS_ORIGINS))
+    # "primary" (Postgres) or "snapshot" (local DuckDB file) for routes that support both
+    analytics_backend: str = "primary"
+    snapshot_path: str = "analytics_snapshot.duckdb"
+    # 0 disables the background refresh of the snapshot file
+    snapshot_refresh_seconds: int = 0
+    # Monthly partitions kept ahead of today, and how many past months stay attached (0 keeps all)
+    partition_months_ahead: int = 3
+    partition_retention_months: int = 0
+    # Partition maintenance normally runs from cron; this also runs it on every cold start
+    maintain_partitions_on_startup: bool = False
+    # Response encodings offered in server preference order (empty disables compression);
+    # br and zstd need the optional brotli / zstandard packages
+    compression_encodings: List[str] = field(default_factory=lambda: ["zstd", "br", "gzip"])
+    compression_minimum_size: int = 1024
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        """Reads settings from environment variables, falling back to the defaults above."""
+        env = os.environ if environ is None else environ
+        enabled = _as_list(env.get("ENABLED_ROUTERS", "all"))
+        if not enabled:
+            enabled = ["all"]
+        if "all" in enabled:
+            enabled = DEFAULT_ROUTERS + [name for name in enabled if name != "all" and name not in DEFAULT_ROUTERS]
+        unknown = [name for name in enabled if name not in ROUTER_GROUPS]
+        if unknown:
+            raise ValueError(f"Unknown router groups in ENABLED_ROUTERS: {', '.join(unknown)}")
+        unknown_encodings = set(_as_list(env.get("COMPRESSION_ENCODINGS", ""))) - {"zstd", "br", "gzip"}
+        if unknown_encodings:
+            raise ValueError(f"Unknown encodings in COMPRESSION_ENCODINGS: {', '.join(sorted(unknown_encodings))}")
+        if not env.get("DATABASE_URL"):
+            raise ValueError("DATABASE_URL must be set")
+        if env.get("ANALYTICS_BACKEND", "primary") not in ("primary", "snapshot"):
+            raise ValueError("ANALYTICS_BACKEND must be 'primary' or 'snapshot'")
+
+        return cls(
+            database_url=env["DATABASE_URL"],
+            db_pool_size=int(env.get("DB_POOL_SIZE", 5)),
+            db_max_overflow=int(env.get("DB_MAX_OVERFLOW", 10)),
+            db_pool_recycle=int(env.get("DB_POOL_RECYCLE", 1800)),
+            warm_pool_connections=int(env.get("WARM_POOL_CONNECTIONS", 2)),
+            warm_caches=_as_bool(env.get("WARM_CACHES", "true")),
+            warm_patient_sketches=_as_bool(env.get("WARM_PATIENT_SKETCHES", "false")),
+            enabled_routers=enabled,
+            cors_origins=_as_list(env.get("CORS_ORIGINS", "")) or list(DEFAULT_CORS_ORIGINS),
+            analytics_backend=env.get("ANALYTICS_BACKEND", "primary"),
+            snapshot_path=env.get("SNAPSHOT_PATH", "analytics_snapshot.duckdb"),
+            snapshot_refresh_seconds=int(env.get("SNAPSHOT_REFRESH_SECONDS", 0)),
+            partition_months_ahead=int(env.get("PARTITION_MONTHS_AHEAD", 3)),
+            partition_retention_months=int(env.get("PARTITION_RETENTION_MONTHS", 0)),
+            maintain_partitions_on_startup=_as_bool(env.get("MAINTAIN_PARTITIONS_ON_STARTUP", "false")),
+            compression_encodings=_as_list(env.get("COMPRESSION_ENCODINGS", "zstd,br,gzip")),
+            compression_minimum_size=int(env.get("COMPRESSION_MIN_SIZE", 1024)),
+        )
@@ -0,0 +1,221 @@
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+from sqlalchemy import exc as sa_exc, inspect
+from sqlalchemy.orm import Session
+import app.models as models
+from .lab_index import index_lab_results
+from .watermarks import set_watermark
+
+MAX_BATCH_ROWS = 500_000
+# Request bodies are read up to this size; larger batches are rejected before parsing
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+# Keys of rows skipped because they already exist, echoed back per table
+MAX_REPORTED_SKIPPED = 100
+_NULL = "\\N"
+
+@dataclass(frozen=True)
+class Dataset:
+    model: type
+    # etl_watermarks row advanced by each load (the watchdog reports it)
+    pipeline: str
+    timestamp_column: Optional[str] = None
+
+DATASETS = {
+    "invoices": Dataset(models.Invoice, "billing_pipeline", "created_at"),
+    "invoice_items": Dataset(models.InvoiceItem, "billing_pipeline"),
+    "lab_results": Dataset(models.LabResult, "diagnostics_pipeline", "uploaded_at"),
+    "treatment_records": Dataset(models.TreatmentRecord, "clinical_pipeline", "performed_at"),
+}
+
+class IngestError(ValueError):
+    pass
+
+# --- Parsing ---
+
+def _column_names(model) -> Dict[str, str]:
+    """Accepts both attribute names (totalAmount) and column names (total_amount)."""
+    names = {}
+    for attr in inspect(model).column_attrs:
+        column = attr.columns[0].name
+        names[attr.key] = column
+        names[column] = column
+    return names
+
+def _normalize(model, record: dict, line: int) -> dict:
+    names = _column_names(model)
+    if None in record:
+        # csv.DictReader files surplus values under the None key
+        raise IngestError(f"Record {line}: more values than header columns")
+    unknown = [key for key in record if key not in names]
+    if unknown:
+        raise IngestError(f"Record {line}: unknown field(s) {', '.join(unknown)}")
+    row = {names[key]: (None if value == "" else value) for key, value in record.items()}
+    for pk in inspect(model).primary_key:
+        if row.get(pk.name) is None:
+            raise IngestError(f"Record {line}: missing primary key '{pk.name}' (required for idempotent loads)")
+    # COPY names every column, so server defaults never apply and NOT NULL columns must be given
+    missing = [column.name for column in model.__table__.columns if not column.nullable and row.get(column.name) is None]
+    if missing:
+        raise IngestError(f"Record {line}: missing required field(s) {', '.join(missing)}")
+    return row
+
+def parse_batch(dataset: str, body: bytes, fmt: str) -> Dict[str, List[dict]]:
+    """
+    Parses an NDJSON or CSV batch into rows keyed by dataset.
+    NDJSON invoices may embed their line items under "items".
+    """
+    model = DATASETS[dataset].model
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise IngestError("Batch is not valid UTF-8")
+    if fmt == "csv":
+        records = list(csv.DictReader(io.StringIO(text)))
+    else:
+        try:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except ValueError as exc:
+            raise IngestError(f"Invalid NDJSON: {exc}")
+    if len(records) > MAX_BATCH_ROWS:
+        raise IngestError(f"Batch exceeds {MAX_BATCH_ROWS} records")
+
+    rows = {dataset: []}
+    for line, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            raise IngestError(f"Record {line}: expected an object")
+        items = record.pop("items", None) if dataset == "invoices" else None
+        if items is not None and (not isinstance(items, list) or not all(isinstance(item, dict) for item in items)):
+            raise IngestError(f"Record {line}: 'items' must be a list of objects")
+        row = _normalize(model, record, line)
+        rows[dataset].append(row)
+        for item in items or []:
+            item = _normalize(models.InvoiceItem, {"invoice_id": row["invoice_id"], **item}, line)
+            rows.setdefault("invoice_items", []).append(item)
+    return rows
+
+# --- Loading ---
+
+def _csv_value(value) -> str:
+    if value is None:
+        return _NULL
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+def _copy(cursor, table: str, columns: List[str], rows: List[dict]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')"
+    if hasattr(cursor, "copy_expert"):
+        # psycopg2
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+def _load_table(cursor, dataset: Dataset, rows: List[dict]) -> Tuple[int, List[dict], Optional[datetime]]:
+    """
+    COPY into a transaction-scoped staging table, then merge new primary keys only.
+    Returns (inserted, keys skipped because they already exist, latest timestamp).
+    """
+    table = dataset.model.__table__
+    staging = f"stg_{table.name}"
+    columns = [column.name for column in table.columns]
+    pk_columns = [column.name for column in table.primary_key.columns]
+    pk = ", ".join(pk_columns)
+    column_list = ", ".join(columns)
+
+    cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP")
+    _copy(cursor, staging, columns, rows)
+    # Existing rows are never overwritten; report them so a corrected resend isn't silently lost
+    match = " AND ".join(f"t.{column} = s.{column}" for column in pk_columns)
+    cursor.execute(
+        f"SELECT DISTINCT {', '.join(f's.{column}' for column in pk_columns)} FROM {staging} s "
+        f"WHERE EXISTS (SELECT 1 FROM {table.name} t WHERE {match})"
+    )
+    skipped = [{column: str(value) for column, value in zip(pk_columns, key)} for key in cursor.fetchall()]
+    cursor.execute(
+        f"INSERT INTO {table.name} ({column_list}) "
+        f"SELECT DISTINCT ON ({pk}) {column_list} FROM {staging} "
+        f"ON CONFLICT ({pk}) DO NOTHING"
+    )
+    inserted = cursor.rowcount
+
+    latest = None
+    if dataset.timestamp_column:
+        cursor.execute(f"SELECT max({dataset.timestamp_column}) FROM {staging}")
+        latest = cursor.fetchone()[0]
+    return inserted, skipped, latest
+
+def _staged_lab_results(cursor) -> List[tuple]:
+    """Rows for the lab-value index, with hospital resolved from the uploading staff member."""
+    cursor.execute(
+        "SELECT l.id, l.test_id, s.hospital_id, l.uploaded_at, l.result_data "
+        "FROM lab_result l JOIN (SELECT DISTINCT id FROM stg_lab_result) staged ON staged.id = l.id "
+        "LEFT JOIN staff s ON s.staff_id = l.uploaded_by"
+    )
+    # The raw cursor may hand back UUIDs as text
+    return [
+        (UUID(str(lab_id)), UUID(str(test_id)), UUID(str(hospital_id)) if hospital_id else None, uploaded_at, data)
+        for lab_id, test_id, hospital_id, uploaded_at, data in cursor.fetchall()
+    ]
+
+def _staged_hospitals(cursor) -> Set[UUID]:
+    cursor.execute("SELECT DISTINCT hospital_id FROM stg_invoices")
+    return {UUID(str(row[0])) for row in cursor.fetchall() if row[0]}
+
+def ingest_batch(db: Session, rows: Dict[str, List[dict]]) -> Dict:
+    """
+    Loads parsed rows in one transaction: staging COPY + merge per table,
+    watermark updates and the lab-value index for new lab results.
+    Re-sending a batch is a no-op because merges skip existing primary keys; those
+    are counted (and the first few listed) under "skipped" rather than updated.
+    Values Postgres rejects (bad UUIDs or timestamps, NULLs, unknown foreign keys) raise IngestError.
+    """
+    dbapi = db.get_bind().dialect.loaded_dbapi
+    data_errors = (sa_exc.DataError, sa_exc.IntegrityError, dbapi.DataError, dbapi.IntegrityError)
+    # Parents first so invoice_items can reference invoices from the same batch
+    order = [name for name in ("invoices", "invoice_items", "lab_results", "treatment_records") if rows.get(name)]
+    summary, touched_hospitals = {}, set()
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        for name in order:
+            dataset = DATASETS[name]
+            inserted, skipped, latest = _load_table(cursor, dataset, rows[name])
+            summary[name] = {
+                "received": len(rows[name]),
+                "inserted": inserted,
+                "skipped": len(skipped),
+                "skippedKeys": skipped[:MAX_REPORTED_SKIPPED]
+            }
+            set_watermark(db, dataset.pipeline, latest or (datetime.now() if inserted else None))
+
+            if name == "invoices":
+                touched_hospitals = _staged_hospitals(cursor)
+            if name == "lab_results":
+                summary[name]["indexedValues"] = index_lab_results(db, _staged_lab_results(cursor))
+        db.commit()
+    except data_errors as exc:
+        db.rollback()
+        raise IngestError(f"Invalid value: {str(exc).splitlines()[0]}") from exc
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if touched_hospitals:
+        # In-process sketches are not transactional; drop them once the data is visible
+        from .api.distribution import invalidate_sketches
+        for hospital_id in touched_hospitals:
+            invalidate_sketches(hospital_id)
+    return summary
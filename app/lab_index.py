@@ -0,0 +1,192 @@
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+import app.models as models
+from .watermarks import get_watermark, set_watermark
+
+PIPELINE = "lab_value_index"
+BATCH_SIZE = 2000
+# Below this many pending rows the pool start-up costs more than it saves
+MIN_ROWS_FOR_POOL = 5000
+# Never more workers than cores, whatever the caller asks for
+MAX_WORKERS = os.cpu_count() or 1
+
+ABNORMAL_FLAGS = {"H", "L", "HH", "LL", "HIGH", "LOW", "A", "ABNORMAL", "CRITICAL", "*"}
+
+# Longer lines are not lab values; the cap also bounds the regex's backtracking
+MAX_LINE_LENGTH = 300
+
+# "Hemoglobin: 11.2 g/dL (13.0-17.0) L", matched after whitespace runs are collapsed, so
+# the analyte's words are split by single spaces only and can't trade spaces with \s*
+_LINE_PATTERN = re.compile(
+    r"^(?P<analyte>[A-Za-z][\w\-/().,%]*(?: [\w\-/().,%]+)*?) ?[:=]? ?"
+    r"(?P<value>-?\d+(?:\.\d+)?)\s*"
+    r"(?P<unit>[^\s()\[\]]*[^\s\d.\-()\[\]][^\s()\[\]]*)?\s*"
+    r"(?:[(\[]\s*(?P<low>-?\d+(?:\.\d+)?)\s*-\s*(?P<high>-?\d+(?:\.\d+)?)\s*[)\]])?\s*"
+    r"(?P<flag>[A-Za-z*]+)?\s*$"
+)
+
+# --- Parsing (runs inside worker processes, so it must stay importable and pure) ---
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _is_abnormal(value: Optional[float], low: Optional[float], high: Optional[float], flag) -> Optional[bool]:
+    if flag is not None and str(flag).strip():
+        return str(flag).strip().upper() in ABNORMAL_FLAGS
+    if value is None or (low is None and high is None):
+        return None
+    return (low is not None and value < low) or (high is not None and value > high)
+
+def _from_json_entry(name: str, entry) -> Optional[Dict]:
+    if not isinstance(entry, dict):
+        value = _to_float(entry)
+        return {"analyte": name, "value": value, "unit": None, "abnormal": None} if value is not None else None
+    name = entry.get("analyte") or entry.get("name") or entry.get("test") or name
+    if not name:
+        return None
+    value = _to_float(entry.get("value"))
+    low = _to_float(entry.get("refLow", entry.get("low")))
+    high = _to_float(entry.get("refHigh", entry.get("high")))
+    flag = entry.get("flag")
+    if isinstance(entry.get("abnormal"), bool):
+        abnormal = entry["abnormal"]
+    else:
+        abnormal = _is_abnormal(value, low, high, flag)
+    return {"analyte": str(name)[:100], "value": value, "unit": entry.get("unit"), "abnormal": abnormal}
+
+def parse_result_data(result_data: Optional[str]) -> List[Dict]:
+    """Parses one resultData payload (JSON or 'analyte: value unit (low-high) flag' lines)."""
+    if not result_data or not result_data.strip():
+        return []
+    try:
+        payload = json.loads(result_data)
+    except ValueError:
+        payload = None
+
+    values = []
+    if isinstance(payload, dict):
+        entries = payload.get("results", payload)
+        if isinstance(entries, dict):
+            values = [_from_json_entry(name, entry) for name, entry in entries.items()]
+        elif isinstance(entries, list):
+            values = [_from_json_entry(None, entry) for entry in entries]
+    elif isinstance(payload, list):
+        values = [_from_json_entry(None, entry) for entry in payload]
+    else:
+        for line in re.split(r"[\n;]", result_data):
+            line = " ".join(line.split())
+            match = _LINE_PATTERN.match(line) if len(line) <= MAX_LINE_LENGTH else None
+            if not match:
+                continue
+            value = _to_float(match.group("value"))
+            unit, flag = match.group("unit"), match.group("flag")
+            if flag is None and unit and unit.upper() in ABNORMAL_FLAGS:
+                # "Creatinine 1.1 H": a bare flag lands in the unit slot
+                unit, flag = None, unit
+            abnormal = _is_abnormal(value, _to_float(match.group("low")), _to_float(match.group("high")), flag)
+            values.append({
+                "analyte": match.group("analyte").strip()[:100],
+                "value": value,
+                "unit": unit,
+                "abnormal": abnormal,
+            })
+    return [value for value in values if value]
+
+def parse_result_batch(rows: List[tuple]) -> List[Dict]:
+    """Worker entry point: (id, test_id, hospital_id, uploaded_at, result_data) rows -> side-table rows."""
+    parsed = []
+    for lab_result_id, test_id, hospital_id, uploaded_at, result_data in rows:
+        for value in parse_result_data(result_data):
+            value.update(labResultId=lab_result_id, testId=test_id, hospitalId=hospital_id, uploadedAt=uploaded_at)
+            if value["unit"] is not None:
+                value["unit"] = str(value["unit"])[:50]
+            parsed.append(value)
+    return parsed
+
+# --- Pipeline ---
+
+def _batches(rows: List[tuple], size: int) -> Iterable[List[tuple]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def index_lab_results(db: Session, rows: List[tuple], executor: Optional[ProcessPoolExecutor] = None) -> int:
+    """
+    (Re)indexes the given lab_result rows inside the caller's transaction.
+    Existing values for those results are replaced, so re-runs are idempotent.
+    """
+    if not rows:
+        return 0
+    batches = list(_batches(rows, BATCH_SIZE))
+    if executor is not None:
+        parsed_batches = executor.map(parse_result_batch, batches)
+    else:
+        parsed_batches = map(parse_result_batch, batches)
+
+    db.execute(delete(models.LabResultValue).where(
+        models.LabResultValue.labResultId.in_([row[0] for row in rows])
+    ))
+    written = 0
+    for parsed in parsed_batches:
+        if parsed:
+            db.execute(insert(models.LabResultValue), parsed)
+            written += len(parsed)
+    return written
+
+def refresh_lab_value_index(db: Session, workers: Optional[int] = None, wave_size: int = 50_000) -> Dict:
+    """
+    Parses lab results uploaded since the last watermark into lab_result_values.
+    Work is streamed in waves, split into batches and parsed across a process pool;
+    the values and the advanced watermark are committed together.
+    """
+    watermark = get_watermark(db, PIPELINE)
+    stmt = select(
+        models.LabResult.id,
+        models.LabResult.testId,
+        models.Staff.hospital_id,
+        models.LabResult.uploadedAt,
+        models.LabResult.resultData,
+    ).outerjoin(
+        models.Staff, models.Staff.staff_id == models.LabResult.uploadedBy
+    ).where(models.LabResult.uploadedAt.isnot(None))
+    if watermark is not None:
+        # >= so rows sharing the watermark timestamp but committed later are not lost
+        stmt = stmt.where(models.LabResult.uploadedAt >= watermark)
+    stmt = stmt.order_by(models.LabResult.uploadedAt).execution_options(yield_per=wave_size)
+
+    workers = min(workers or MAX_WORKERS, MAX_WORKERS)
+    executor = None
+    processed = written = 0
+    try:
+        for wave in db.execute(stmt).partitions(wave_size):
+            wave = [tuple(row) for row in wave]
+            if executor is None and workers > 1 and len(wave) >= MIN_ROWS_FOR_POOL:
+                # spawn, not fork: the caller may be a threaded server holding open connections
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            written += index_lab_results(db, wave, executor)
+            processed += len(wave)
+            set_watermark(db, PIPELINE, wave[-1][3])
+        if not processed:
+            set_watermark(db, PIPELINE, None)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        "pipeline": PIPELINE,
+        "processedResults": processed,
+        "indexedValues": written,
+        "watermark": get_watermark(db, PIPELINE),
+    }
@@ -1,31 +1,170 @@
-from fastapi import FastAPI
-from .api import hospital,patient,appointment,billing,clinical,diagnostics,medicine,pharmacy,overall_analytics,staff
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import importlib
+import logging
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from . import database
+from .compression import CompressionMiddleware
+from .config import ROUTER_GROUPS, Settings
+
+logger = logging.getLogger(__name__)
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+def _warm_pool(engine, connections: int):
+    """Opens connections up front so the first requests don't pay for TLS + auth."""
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            conn.exec_driver_sql("SELECT 1")
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+def _maintain_partitions(settings: Settings):
+    """Keeps future monthly partitions in place (and detaches expired ones) before traffic arrives."""
+    from .partitions import maintain_partitions
+    db = database.SessionLocal()
+    try:
+        return maintain_partitions(db, settings.partition_months_ahead, settings.partition_retention_months)
+    finally:
+        db.close()
+
+def _warm_caches(settings: Settings):
+    """Preloads in-process caches for the mounted routers."""
+    if {"hospital", "pharmacy"} & set(settings.enabled_routers):
+        from .refdata import store as refdata
+        db = database.SessionLocal()
+        try:
+            refdata.reload(db)
+        finally:
+            db.close()
+    if "patient" in settings.enabled_routers:
+        from .cohort import engine as cohort_engine
+        db = database.SessionLocal()
+        try:
+            cohort_engine.refresh(db)
+        finally:
+            db.close()
+    if settings.warm_patient_sketches and "overall_analytics" in settings.enabled_routers:
+        from .approx import distinct_patients
+        db = database.SessionLocal()
+        try:
+            distinct_patients.refresh(db)
+        finally:
+            db.close()
+    if "staff" in settings.enabled_routers:
+        from .utilization import engine as utilization_engine
+        db = database.SessionLocal()
+        try:
+            today = date.today()
+            utilization_engine.refresh(db, today - timedelta(days=30), today)
+        finally:
+            db.close()
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Builds the API with only the enabled router groups mounted; their modules are imported here, on demand."""
+    settings = settings or Settings.from_env()
+    timings = {"routers": {}, "startup": {}}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        started = time.perf_counter()
+        step = time.perf_counter()
+        engine = database.init_engine(
+            settings.database_url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+        )
+        timings["startup"]["engineMs"] = _elapsed_ms(step)
+
+        try:
+            step = time.perf_counter()
+            warmed = _warm_pool(engine, settings.warm_pool_connections)
+            timings["startup"]["poolWarmMs"] = _elapsed_ms(step)
+            timings["startup"]["warmConnections"] = warmed
+
+            if settings.warm_caches:
+                step = time.perf_counter()
+                _warm_caches(settings)
+                timings["startup"]["cacheWarmMs"] = _elapsed_ms(step)
+        except Exception:
+            # A cold database must not keep the instance from serving; requests retry lazily
+            logger.exception("Startup warm-up failed")
+
+        if settings.maintain_partitions_on_startup:
+            # Off by default (cron runs `python -m app.partitions`); needs DDL rights when on
+            try:
+                step = time.perf_counter()
+                _maintain_partitions(settings)
+                timings["startup"]["partitionsMs"] = _elapsed_ms(step)
+            except Exception:
+                logger.exception("Startup partition maintenance failed")
+
+        if settings.snapshot_refresh_seconds > 0:
+            from .snapshot import get_store
+            get_store(settings.snapshot_path).start_background_refresh(
+                database.SessionLocal, settings.snapshot_refresh_seconds
+            )
+
+        timings["startup"]["totalMs"] = _elapsed_ms(started)
+        logger.info("Startup timings: %s", timings)
+        yield
+        if settings.snapshot_refresh_seconds > 0:
+            get_store(settings.snapshot_path).stop()
+        if database.engine is not None:
+            database.engine.dispose()
+
+    created = time.perf_counter()
+    app = FastAPI(title="Arogya Mitra Analytics Hub", lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins, # change it with react dev urls
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    if settings.compression_encodings:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            encodings=settings.compression_encodings,
+        )
 
-app = FastAPI(title="Arogya Mitra Analytics Hub")
+    for group in settings.enabled_routers:
+        module_name, prefix, tag = ROUTER_GROUPS[group]
+        step = time.perf_counter()
+        module = importlib.import_module(f".api.{module_name}", __package__)
+        timings["routers"][group] = _elapsed_ms(step)
+        app.include_router(module.router, prefix=prefix, tags=[tag])
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:5173"], # change it with react dev urls
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    timings["createAppMs"] = _elapsed_ms(created)
+    app.state.settings = settings
+    app.state.timings = timings
 
+    @app.get("/")
+    def root():
+        return {"message": "Arogya Mitra Analytics Hub is Online"}
 
-app.include_router(hospital.router, prefix="/api/v1/hospitals", tags=["Hospital Analytics"])
-app.include_router(patient.router, prefix="/api/v1/patients", tags=["Patient Analytics"])
-app.include_router(appointment.router, prefix="/api/v1/appointments", tags=["Appointment Analytics"])
-app.include_router(staff.router, prefix="/api/v1/staff", tags=["Staff Analytics"])
-app.include_router(billing.router, prefix="/api/v1/billings", tags=["Billing Analytics"])
-app.include_router(clinical.router, prefix="/api/v1/clinical", tags=["Clinical Analytics"])
-app.include_router(diagnostics.router, prefix="/api/v1/diagnostics", tags=["Diagnostics Analytics"])
-app.include_router(medicine.router, prefix="/api/v1/medicine", tags=["Medicine Analytics"])
-app.include_router(pharmacy.router, prefix="/api/v1/pharmacy", tags=["Pharmacy Analytics"])
-app.include_router(overall_analytics.router, prefix="/api/v1/summary_analytics", tags=["Overall Analytics"])
+    @app.get("/health/startup")
+    def startup_report(request: Request):
+        """Import and startup timings for cold-start tuning."""
+        return {"enabledRouters": settings.enabled_routers, **request.app.state.timings}
 
+    return app
 
 
-@app.get("/")
-def root():
-    return {"message": "Arogya Mitra Analytics Hub is Online"}
\ No newline at end of file
+app = create_app()
+app.state.timings["moduleImportMs"] = _elapsed_ms(_IMPORT_STARTED)
@@ -1,6 +1,6 @@
 import enum
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, Date, ForeignKey, Boolean, Enum as SQLEnum, Float
+from sqlalchemy import Column, String, Integer, DateTime, Date, ForeignKey, Boolean, Enum as SQLEnum, Float, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -61,26 +61,33 @@ class Patient(Base):
 # --- APPOINTMENT MODEL ---
 class Appointment(Base):
     __tablename__ = "appointments"
+    # Range-partitioned by month on "date" (migrations/004), which therefore joins the primary key
     appointmentId = Column("appointment_id", UUID(as_uuid=True), primary_key=True)
     hospitalId = Column("hospital_id", UUID(as_uuid=True))
-    date = Column("date", Date) 
+    patientId = Column("patient_id", UUID(as_uuid=True))
+    doctorId = Column("doctor_id", UUID(as_uuid=True))
+    date = Column("date", Date, primary_key=True)
+    timeSlot = Column("time_slot", String)
+    type = Column("type", String)
     status = Column("status", String)
     createdAt = Column("created_at", DateTime)
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    # Range-partitioned by month on created_at (migrations/004), which therefore joins the primary key
     invoiceId = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, name="invoice_id")
     hospitalId = Column(UUID(as_uuid=True), ForeignKey("hospitals.hospital_id"), name="hospital_id", nullable=False)
     patientId = Column(UUID(as_uuid=True), ForeignKey("patients.patient_id"), name="patient_id", nullable=False) 
     totalAmount = Column(Float, name="total_amount", default=0.0)
     status = Column(SQLEnum(InvoiceStatus), name="status")
-    createdAt = Column(DateTime, name="created_at")
+    createdAt = Column(DateTime, name="created_at", primary_key=True)
     items = relationship("InvoiceItem", back_populates="invoice")
 
 # --- INVOICE ITEM MODEL ---
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
     itemId = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, name="item_id")
+    # ORM join only: the database can't enforce it once invoices is partitioned (migrations/004)
     invoiceId = Column(UUID(as_uuid=True), ForeignKey("invoices.invoice_id"), name="invoice_id", nullable=False)
     referenceId = Column(UUID(as_uuid=True), name="reference_id") 
     referenceType = Column(String(50), name="reference_type") 
@@ -92,6 +99,7 @@ class InvoiceItem(Base):
 class InsuranceClaim(Base):
     __tablename__ = "insurance_claims"
     claimId = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, name="claim_id")
+    # ORM join only: the database can't enforce it once invoices is partitioned (migrations/004)
     invoiceId = Column(UUID(as_uuid=True), ForeignKey("invoices.invoice_id"), name="invoice_id", nullable=False)
     providerName = Column(String(255), name="provider_name")
     policyNumber = Column(String(100), name="policy_number")
@@ -107,9 +115,10 @@ class TreatmentRecord(Base):
 
 class LabResult(Base):
     __tablename__ = "lab_result"
+    # Range-partitioned by month on uploaded_at (migrations/004), which therefore joins the primary key
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, name="id")
     testId = Column(UUID(as_uuid=True), name="test_id", nullable=False)
-    uploadedAt = Column(DateTime, name="uploaded_at")
+    uploadedAt = Column(DateTime, name="uploaded_at", primary_key=True)
     uploadedBy = Column(UUID(as_uuid=True), name="uploaded_by") 
     description = Column(String(255), name="description")
     resultData = Column(String, name="result_data") 
@@ -127,7 +136,9 @@ class Pharmacy(Base):
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
     address = Column(String, nullable=False)
-    affiliatedHospitalId = Column("affiliated_hospital_id", String) 
+    affiliatedHospitalId = Column(
+        "affiliated_hospital_id", UUID(as_uuid=True), ForeignKey("hospitals.hospital_id"), index=True
+    )
 
 class Bed(Base):
     __tablename__ = "beds"
@@ -168,7 +179,9 @@ class Ambulance(Base):
 class DiagnosticCentre(Base):
     __tablename__ = "diagnostic_centre"
     id = Column(String, primary_key=True)
-    affiliatedHospital = Column("affiliated_hospital", String) 
+    affiliatedHospital = Column(
+        "affiliated_hospital", UUID(as_uuid=True), ForeignKey("hospitals.hospital_id"), index=True
+    )
     name = Column(String, nullable=False)
     location = Column(String)
     rating = Column(Float) 
@@ -220,4 +233,36 @@ class DoctorAvailabilityTimeSlot(Base):
 class DoctorFeedback(Base):
     __tablename__ = "doctor_feedback"
     doctor_staff_id = Column(UUID(as_uuid=True), ForeignKey("doctor.staff_id"), primary_key=True)
-    feedback = Column(String(255))
\ No newline at end of file
+    feedback = Column(String(255))
+
+class EtlWatermark(Base):
+    __tablename__ = "etl_watermarks"
+    # One row per incremental pipeline, e.g. "lab_value_index"
+    pipeline = Column(String(100), primary_key=True)
+    watermark = Column(DateTime)
+    updatedAt = Column(DateTime, name="updated_at")
+
+class LabResultValue(Base):
+    __tablename__ = "lab_result_values"
+    # Typed side table parsed from LabResult.resultData
+    __table_args__ = (
+        Index("ix_lab_result_values_hospital_test_time", "hospital_id", "test_id", "uploaded_at"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # ORM join only: the database can't enforce it once lab_result is partitioned (migrations/004)
+    labResultId = Column(UUID(as_uuid=True), ForeignKey("lab_result.id"), name="lab_result_id", nullable=False, index=True)
+    testId = Column(UUID(as_uuid=True), name="test_id", nullable=False)
+    hospitalId = Column(UUID(as_uuid=True), ForeignKey("hospitals.hospital_id"), name="hospital_id")
+    analyte = Column(String(100), name="analyte", nullable=False)
+    value = Column(Float, name="value")
+    unit = Column(String(50), name="unit")
+    abnormal = Column(Boolean, name="abnormal")
+    uploadedAt = Column(DateTime, name="uploaded_at")
+
+class PatientSketch(Base):
+    __tablename__ = "patient_sketches"
+    # HyperLogLog registers of distinct patients per hospital and appointment month (app/approx.py)
+    hospitalId = Column(UUID(as_uuid=True), primary_key=True, name="hospital_id")
+    month = Column(Date, primary_key=True)  # first day of the month
+    registers = Column(LargeBinary, nullable=False)
+    updatedAt = Column(DateTime, name="updated_at")
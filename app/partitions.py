@@ -0,0 +1,126 @@
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Serializes maintenance across instances starting together (pg_advisory_xact_lock key)
+MAINTENANCE_LOCK_KEY = 0x70617274
+
+# Tables range-partitioned by month in migrations/004: table -> partition key column
+PARTITIONED_TABLES = {
+    "appointments": "date",
+    "lab_result": "uploaded_at",
+    "invoices": "created_at",
+}
+
+def _month_start(day: date, offset: int = 0) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+def _is_partitioned(db: Session, table: str) -> bool:
+    return db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    ).scalar()
+
+def _partitions(db: Session, table: str) -> List[str]:
+    return db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table}
+    ).scalars().all()
+
+def _create_partition(db: Session, table: str, key: str, month: date, has_default: bool):
+    name, lower, upper = partition_name(table, month), month, _month_start(month, 1)
+    bounds = {"lower": lower, "upper": upper}
+    moved = False
+    if has_default:
+        # Postgres refuses the new partition while DEFAULT holds rows in its range, so move them across
+        default = f"{table}_default"
+        moved = db.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE "{key}" >= :lower AND "{key}" < :upper)'), bounds
+        ).scalar()
+        if moved:
+            db.execute(text(
+                f'CREATE TEMP TABLE "_moved_{name}" ON COMMIT DROP AS '
+                f'SELECT * FROM "{default}" WHERE "{key}" >= :lower AND "{key}" < :upper'
+            ), bounds)
+            db.execute(text(f'DELETE FROM "{default}" WHERE "{key}" >= :lower AND "{key}" < :upper'), bounds)
+    db.execute(text(
+        f"CREATE TABLE \"{name}\" PARTITION OF \"{table}\" FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    if moved:
+        db.execute(text(f'INSERT INTO "{table}" SELECT * FROM "_moved_{name}"'))
+
+def ensure_partitions(db: Session, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """Creates any missing monthly partitions from the current month to months_ahead; returns their names."""
+    today = today or date.today()
+    created = []
+    for table, key in PARTITIONED_TABLES.items():
+        if not _is_partitioned(db, table):
+            continue
+        existing = set(_partitions(db, table))
+        for offset in range(months_ahead + 1):
+            month = _month_start(today, offset)
+            if partition_name(table, month) not in existing:
+                _create_partition(db, table, key, month, f"{table}_default" in existing)
+                created.append(partition_name(table, month))
+    return created
+
+def detach_partitions_before(db: Session, retention_months: int, today: Optional[date] = None) -> List[str]:
+    """
+    Detaches monthly partitions older than retention_months. The detached tables are left
+    in place for archiving or dropping; queries on the parent stop seeing their rows.
+    """
+    cutoff = partition_name("", _month_start(today or date.today(), -retention_months))
+    detached = []
+    for table in PARTITIONED_TABLES:
+        if not _is_partitioned(db, table):
+            continue
+        for name in sorted(_partitions(db, table)):
+            suffix = name[len(table):]
+            # Monthly partitions only: "_YYYY_MM" sorts chronologically, "_default" is skipped
+            if len(suffix) == 8 and suffix[1:5].isdigit() and suffix < cutoff:
+                db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+                detached.append(name)
+    return detached
+
+def maintain_partitions(db: Session, months_ahead: int = 3, retention_months: int = 0) -> Dict[str, List[str]]:
+    """
+    Run from cron via `python -m app.partitions` (or at startup when opted in): creates future
+    partitions and, when retention_months > 0, detaches the expired ones. A no-op before migrations/004.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return {"created": [], "detached": []}
+    try:
+        # Concurrent runs queue here and then find the partitions already created
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        created = ensure_partitions(db, months_ahead)
+        detached = detach_partitions_before(db, retention_months) if retention_months > 0 else []
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if created or detached:
+        logger.info("Partitions created: %s; detached: %s", created, detached)
+    return {"created": created, "detached": detached}
+
+if __name__ == "__main__":
+    from .config import Settings
+    from .database import SessionLocal, init_engine
+
+    settings = Settings.from_env()
+    init_engine(settings.database_url)
+    session = SessionLocal()
+    try:
+        print(maintain_partitions(session, settings.partition_months_ahead, settings.partition_retention_months))
+    finally:
+        session.close()
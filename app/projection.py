@@ -0,0 +1,68 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+from fastapi import HTTPException, Query
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. fields=name,city"
+
+def field_projection(schema: Type[BaseModel]):
+    """
+    Route dependency for ?fields=: returns the requested field names of `schema`
+    (in schema order), or None when the parameter is absent.
+    """
+    def dependency(fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)) -> Optional[Tuple[str, ...]]:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested - set(schema.model_fields))
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown field(s): {', '.join(unknown)}" if unknown else "fields must not be empty"
+            )
+        return tuple(name for name in schema.model_fields if name in requested)
+    return dependency
+
+@lru_cache(maxsize=256)
+def projected_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Subset of `schema` with only `fields`, built once per distinct selection."""
+    return create_model(
+        f"{schema.__name__}Projection",
+        __config__=schema.model_config,
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    )
+
+@lru_cache(maxsize=256)
+def _adapter(schema: Type[BaseModel], fields: Tuple[str, ...], many: bool) -> TypeAdapter:
+    projected = projected_schema(schema, fields)
+    return TypeAdapter(List[projected] if many else projected)
+
+def load_options(model, fields: Optional[Tuple[str, ...]]) -> list:
+    """
+    Query options that load only the mapped columns behind `fields` (the primary key is
+    always loaded) and eager-load requested relationships in one extra SELECT each.
+    Without a projection every column is loaded and relationships are still batched.
+    """
+    mapper = inspect(model)
+    relationships = [rel for rel in mapper.relationships if fields is None or rel.key in fields]
+    options = [selectinload(getattr(model, rel.key)) for rel in relationships]
+    if fields is not None:
+        columns = [attr.class_attribute for attr in mapper.column_attrs if attr.key in fields]
+        if not columns:
+            # Only relationships requested: the primary key is all the parent row needs
+            columns = [mapper.get_property_by_column(column).class_attribute for column in mapper.primary_key]
+        options.append(load_only(*columns))
+    return options
+
+def project(schema: Type[BaseModel], data, fields: Optional[Tuple[str, ...]]):
+    """
+    Serializes ORM rows or schema instances (one, or a list) through the projected schema
+    when `fields` is set; otherwise returns `data` untouched for the route's response_model.
+    """
+    if fields is None:
+        return data
+    adapter = _adapter(schema, fields, isinstance(data, list))
+    return Response(content=adapter.dump_json(adapter.validate_python(data), by_alias=True), media_type="application/json")
@@ -0,0 +1,79 @@
+# Shared, precompiled statements for the hot analytics endpoints.
+# Each statement is built once at import with bound parameters (hospital_id, day, ...)
+# and executed on the session's Core connection, so a request only binds values:
+# no ORM query chain is rebuilt and the compiled SQL is reused from the engine cache.
+from datetime import date
+from typing import Dict, Optional
+from uuid import UUID
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+from .models import Ambulance, Appointment, Bed, Invoice, Medicine, TreatmentRecord
+
+MANUFACTURER_DISTRIBUTION = select(
+    Medicine.manufacturer, func.count(Medicine.id)
+).group_by(Medicine.manufacturer)
+
+BED_COUNTS = select(
+    func.count(Bed.bedId), func.count(Bed.bedId).filter(Bed.status == "OCCUPIED")
+).where(Bed.hospitalId == bindparam("hospital_id"))
+
+AMBULANCE_COUNTS = select(
+    func.count(Ambulance.ambulanceId), func.count(Ambulance.ambulanceId).filter(Ambulance.available == True)
+).where(Ambulance.hospitalId == bindparam("hospital_id"))
+
+TOTAL_REVENUE = select(func.sum(Invoice.totalAmount)).where(Invoice.hospitalId == bindparam("hospital_id"))
+
+# Bounds on the partition key (created_at) let Postgres skip whole monthly partitions
+TOTAL_REVENUE_BETWEEN = select(func.sum(Invoice.totalAmount)).where(
+    Invoice.hospitalId == bindparam("hospital_id"),
+    Invoice.createdAt >= bindparam("start"),
+    Invoice.createdAt < bindparam("end")
+)
+
+APPOINTMENT_COUNT_ON = select(func.count(Appointment.appointmentId)).where(
+    Appointment.hospitalId == bindparam("hospital_id"),
+    Appointment.date == bindparam("day")
+)
+
+APPOINTMENT_COUNT_BY_STATUS = select(func.count(Appointment.appointmentId)).where(
+    Appointment.hospitalId == bindparam("hospital_id"),
+    Appointment.status == bindparam("status")
+)
+
+TREATMENT_OUTCOME_COUNTS = select(
+    func.count(TreatmentRecord.recordId),
+    func.count(TreatmentRecord.recordId).filter(TreatmentRecord.outcome == "SUCCESS")
+)
+
+def _execute(db: Session, stmt, **params):
+    # Column-only selects need no ORM processing, so they go straight to Core
+    return db.connection().execute(stmt, params)
+
+def manufacturer_distribution(db: Session) -> Dict[str, int]:
+    return {manufacturer: count for manufacturer, count in _execute(db, MANUFACTURER_DISTRIBUTION) if manufacturer}
+
+def bed_counts(db: Session, hospital_id: UUID):
+    """(total, occupied) in one scan."""
+    return tuple(_execute(db, BED_COUNTS, hospital_id=hospital_id).one())
+
+def ambulance_counts(db: Session, hospital_id: UUID):
+    """(total, available) in one scan."""
+    return tuple(_execute(db, AMBULANCE_COUNTS, hospital_id=hospital_id).one())
+
+def total_revenue(db: Session, hospital_id: UUID, start: Optional[date] = None, end: Optional[date] = None) -> float:
+    """All-time revenue, or revenue invoiced in [start, end) when either bound is given."""
+    if start is None and end is None:
+        return _execute(db, TOTAL_REVENUE, hospital_id=hospital_id).scalar() or 0.0
+    return _execute(
+        db, TOTAL_REVENUE_BETWEEN, hospital_id=hospital_id, start=start or date.min, end=end or date.max
+    ).scalar() or 0.0
+
+def appointment_count_on(db: Session, hospital_id: UUID, day: date) -> int:
+    return _execute(db, APPOINTMENT_COUNT_ON, hospital_id=hospital_id, day=day).scalar() or 0
+
+def appointment_count_by_status(db: Session, hospital_id: UUID, status: str) -> int:
+    return _execute(db, APPOINTMENT_COUNT_BY_STATUS, hospital_id=hospital_id, status=status).scalar() or 0
+
+def treatment_outcome_counts(db: Session):
+    """(total, successful) treatment records in one scan."""
+    return tuple(_execute(db, TREATMENT_OUTCOME_COUNTS).one())
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import app.models as models
+import app.schemas as schemas
+
+logger = logging.getLogger(__name__)
+
+# Hospitals carry updated_at and are topped up incrementally this often
+INCREMENTAL_REFRESH_SECONDS = 60
+# Departments, treatments, pharmacies and medicines have no updated_at, so they are reloaded whole
+FULL_RELOAD_SECONDS = 15 * 60
+# Ids of invalid rows quoted in the warning logged per table
+MAX_LOGGED_INVALID = 10
+
+def _validated(schema, rows, table: str, key: str) -> List[Tuple[object, object]]:
+    """
+    (row, schema instance) for each row that validates. Invalid rows (e.g. a NULL in a
+    required column) are skipped and logged once per table, so one bad row doesn't fail the load.
+    """
+    valid, invalid = [], []
+    for row in rows:
+        try:
+            valid.append((row, schema.model_validate(row)))
+        except ValidationError:
+            invalid.append(getattr(row, key))
+    if invalid:
+        logger.warning(
+            "Skipped %d invalid %s rows: %s", len(invalid), table,
+            ", ".join(str(row_id) for row_id in invalid[:MAX_LOGGED_INVALID])
+        )
+    return valid
+
+class ReferenceDataStore:
+    """
+    Process-level copy of slow-changing reference tables, indexed by id and by hospital.
+    Reads call ensure_fresh(), which refreshes at most once per interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hospitals: Dict[UUID, schemas.HospitalRead] = {}
+        self.departments: Dict[UUID, schemas.DepartmentRead] = {}
+        self.departments_by_hospital: Dict[UUID, List[UUID]] = {}
+        self.service_counts: Dict[UUID, int] = {}
+        self.pharmacies_by_hospital: Dict[UUID, List[dict]] = {}
+        self.medicines: List[schemas.MedicineRead] = []
+        self.medicines_by_id: Dict[UUID, schemas.MedicineRead] = {}
+        self._hospital_watermark: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._reloaded_at > 0
+
+    # --- Loading ---
+
+    def _load_hospitals(self, db: Session, since: Optional[datetime] = None):
+        """Full load (since=None) or top-up; either way a new dict is built and swapped in."""
+        query = db.query(models.Hospital)
+        hospitals = dict(self.hospitals) if since is not None else {}
+        watermark = self._hospital_watermark if since is not None else None
+        if since is not None:
+            query = query.filter(models.Hospital.updatedAt >= since)
+        rows = query.all()
+        for hospital in rows:
+            # An edit that made a hospital invalid drops it rather than keeping the stale copy
+            hospitals.pop(hospital.hospitalId, None)
+            if hospital.updatedAt and (watermark is None or hospital.updatedAt > watermark):
+                watermark = hospital.updatedAt
+        for hospital, read in _validated(schemas.HospitalRead, rows, "hospitals", "hospitalId"):
+            hospitals[hospital.hospitalId] = read
+        self.hospitals, self._hospital_watermark = hospitals, watermark
+
+    def _load_static(self, db: Session):
+        departments, by_hospital = {}, defaultdict(list)
+        rows = db.query(models.Department).all()
+        for department, read in _validated(schemas.DepartmentRead, rows, "departments", "departmentId"):
+            departments[department.departmentId] = read
+            by_hospital[department.hospitalId].append(department.departmentId)
+
+        service_counts = dict(db.query(
+            models.DepartmentTreatment.departmentId,
+            func.count(models.DepartmentTreatment.treatmentName)
+        ).group_by(models.DepartmentTreatment.departmentId).all())
+
+        pharmacies = defaultdict(list)
+        for pharmacy in db.query(models.Pharmacy).order_by(models.Pharmacy.name).all():
+            pharmacies[pharmacy.affiliatedHospitalId].append({
+                "id": pharmacy.id,
+                "name": pharmacy.name,
+                "address": pharmacy.address,
+                "affiliatedHospitalId": pharmacy.affiliatedHospitalId
+            })
+
+        medicines = [read for _, read in _validated(schemas.MedicineRead, db.query(models.Medicine).all(), "medicines", "id")]
+
+        # Swap whole structures so concurrent readers never see a half-built index
+        self.departments = departments
+        self.departments_by_hospital = dict(by_hospital)
+        self.service_counts = service_counts
+        self.pharmacies_by_hospital = dict(pharmacies)
+        self.medicines = medicines
+        self.medicines_by_id = {medicine.id: medicine for medicine in medicines}
+
+    def _full_load(self, db: Session):
+        self._load_hospitals(db)
+        self._load_static(db)
+        self._refreshed_at = self._reloaded_at = time.monotonic()
+
+    def reload(self, db: Session):
+        """Full load of every reference table."""
+        with self._lock:
+            self._full_load(db)
+
+    def _reload_due(self, now: float) -> bool:
+        return not self.loaded or now - self._reloaded_at > FULL_RELOAD_SECONDS
+
+    def ensure_fresh(self, db: Session):
+        now = time.monotonic()
+        if self._reload_due(now):
+            with self._lock:
+                # Re-checked under the lock so concurrent callers don't reload back to back
+                if self._reload_due(time.monotonic()):
+                    self._full_load(db)
+        elif now - self._refreshed_at > INCREMENTAL_REFRESH_SECONDS:
+            with self._lock:
+                if time.monotonic() - self._refreshed_at > INCREMENTAL_REFRESH_SECONDS:
+                    self._load_hospitals(db, since=self._hospital_watermark)
+                    self._refreshed_at = time.monotonic()
+
+    # --- Lookups ---
+
+    def all_hospitals(self) -> List[schemas.HospitalRead]:
+        return list(self.hospitals.values())
+
+    def hospital(self, hospital_id: UUID) -> Optional[schemas.HospitalRead]:
+        return self.hospitals.get(hospital_id)
+
+    def hospital_name(self, hospital_id: UUID) -> Optional[str]:
+        hospital = self.hospitals.get(hospital_id)
+        return hospital.name if hospital else None
+
+    def hospital_departments(self, hospital_id: UUID) -> List[schemas.DepartmentRead]:
+        return [self.departments[dept_id] for dept_id in self.departments_by_hospital.get(hospital_id, [])]
+
+    def department_service_counts(self, hospital_id: UUID) -> Dict[str, int]:
+        """Same shape as the department service-count query: dept name -> treatments offered."""
+        counts = defaultdict(int)
+        for department in self.hospital_departments(hospital_id):
+            count = self.service_counts.get(department.departmentId)
+            if count:
+                counts[department.deptName] += count
+        return dict(counts)
+
+    def hospital_pharmacies(self, hospital_id: UUID) -> List[dict]:
+        return self.pharmacies_by_hospital.get(hospital_id, [])
+
+store = ReferenceDataStore()
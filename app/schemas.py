@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 from uuid import UUID
 from datetime import datetime, date
@@ -35,6 +35,19 @@ class PatientRead(PatientBase):
     userId: UUID
     createdAt: Optional[datetime] = None
 
+class CohortQuery(BaseSchema):
+    hospitalIds: Optional[List[UUID]] = None
+    genders: Optional[List[str]] = None
+    bloodGroups: Optional[List[str]] = None
+    active: Optional[bool] = None
+    ageMin: Optional[int] = Field(None, ge=0)
+    ageMax: Optional[int] = Field(None, ge=0)
+    registeredFrom: Optional[date] = None
+    registeredTo: Optional[date] = None
+    # Any of: hospital, age_band, gender, blood_group, active, registration_month
+    groupBy: List[str] = []
+    ageBandWidth: int = Field(10, ge=1, le=50)
+
 class AppointmentBase(BaseSchema):
     date: date
     timeSlot: str
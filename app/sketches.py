@@ -0,0 +1,220 @@
+import hashlib
+import math
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+
+
+class TDigest:
+    """
+    Mergeable quantile sketch (merging t-digest, k1 scale function).
+    Values are buffered and folded into a bounded set of centroids, so a digest
+    built per hospital can be merged with others for regional views.
+    """
+
+    def __init__(self, compression: int = 200, buffer_size: int = 5000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        # Buffered chunks as float arrays, folded into the centroids once buffer_size is reached
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: Iterable[Optional[float]]) -> "TDigest":
+        """Adds a chunk of raw values (None and NaN are skipped) as one NumPy array."""
+        chunk = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=float)
+        # dtype=float turns None into NaN
+        chunk = chunk[~np.isnan(chunk)]
+        if not chunk.size:
+            return self
+        self._buffer.append(chunk)
+        self._buffered += chunk.size
+        self.count += int(chunk.size)
+        self.min = min(self.min, float(chunk.min()))
+        self.max = max(self.max, float(chunk.max()))
+        if self._buffered >= self.buffer_size:
+            self._compress()
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Folds another digest into this one (in place)."""
+        other._compress()
+        self._compress()
+        if not other.count:
+            return self
+        self._compress(extra=(other._means, other._weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self) -> "TDigest":
+        self._compress()
+        clone = TDigest(self.compression, self.buffer_size)
+        clone._means = list(self._means)
+        clone._weights = list(self._weights)
+        clone.count, clone.min, clone.max = self.count, self.min, self.max
+        return clone
+
+    # --- Scale function helpers ---
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+
+    def _compress(self, extra: Optional[Tuple[List[float], List[float]]] = None):
+        if not self._buffer and not extra:
+            return
+        means = [np.asarray(self._means, dtype=float), *self._buffer]
+        weights = [np.asarray(self._weights, dtype=float), *[np.ones(chunk.size) for chunk in self._buffer]]
+        if extra:
+            means.append(np.asarray(extra[0], dtype=float))
+            weights.append(np.asarray(extra[1], dtype=float))
+        self._buffer, self._buffered = [], 0
+        means, weights = np.concatenate(means), np.concatenate(weights)
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # Points are grouped by the half unit of the k1 scale their midpoint falls in, so
+        # centroids stay small in the tails and there are at most about `compression` of them
+        scale = self._k((np.cumsum(weights) - weights / 2) / weights.sum())
+        bins = np.floor(2 * scale + self.compression / 2).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+        self._means, self._weights = merged_means.tolist(), merged_weights.tolist()
+
+    # --- Queries ---
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        if len(self._means) == 1:
+            return self._means[0]
+
+        target = q * self.count
+        first_center = self._weights[0] / 2
+        if target < first_center:
+            return self.min + (self._means[0] - self.min) * target / first_center
+
+        cumulative = 0.0
+        for i in range(len(self._means) - 1):
+            left_center = cumulative + self._weights[i] / 2
+            right_center = cumulative + self._weights[i] + self._weights[i + 1] / 2
+            if target <= right_center:
+                span = right_center - left_center
+                frac = (target - left_center) / span if span else 0.0
+                return self._means[i] + (self._means[i + 1] - self._means[i]) * frac
+            cumulative += self._weights[i]
+
+        last_center = self.count - self._weights[-1] / 2
+        tail = self.count - last_center
+        frac = (target - last_center) / tail if tail else 1.0
+        return self._means[-1] + (self.max - self._means[-1]) * frac
+
+    def cdf(self, x: float) -> float:
+        """Estimated fraction of values <= x."""
+        self._compress()
+        if not self.count or x < self.min:
+            return 0.0
+        if x >= self.max:
+            return 1.0
+
+        i = bisect_left(self._means, x)
+        cumulative = sum(self._weights[:i])
+        if i == 0:
+            span = self._means[0] - self.min
+            frac = (x - self.min) / span if span else 1.0
+            return frac * (self._weights[0] / 2) / self.count
+        if i == len(self._means):
+            span = self.max - self._means[-1]
+            frac = (x - self._means[-1]) / span if span else 1.0
+            left = self.count - self._weights[-1] / 2
+            return (left + frac * self._weights[-1] / 2) / self.count
+
+        left_center = cumulative - self._weights[i - 1] / 2
+        right_center = cumulative + self._weights[i] / 2
+        span = self._means[i] - self._means[i - 1]
+        frac = (x - self._means[i - 1]) / span if span else 1.0
+        return (left_center + frac * (right_center - left_center)) / self.count
+
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count sketch (HyperLogLog with linear counting for small sets).
+    2**precision one-byte registers; the relative standard error is 1.04 / sqrt(2**precision),
+    about 1.6% at the default precision of 12 (4 KB per sketch).
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self._registers = bytearray(self.m)
+
+    @staticmethod
+    def _hash(value) -> int:
+        data = value.bytes if isinstance(value, UUID) else str(value).encode()
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+    def add(self, value):
+        hashed = self._hash(value)
+        width = 64 - self.precision
+        index = hashed >> width
+        rank = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def update(self, values: Iterable) -> "HyperLogLog":
+        """Adds a chunk of values (None is skipped). Re-adding a value is a no-op."""
+        for value in values:
+            if value is not None:
+                self.add(value)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Folds another sketch into this one (in place): the union of both sets."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    def copy(self) -> "HyperLogLog":
+        clone = HyperLogLog(self.precision)
+        clone._registers = bytearray(self._registers)
+        return clone
+
+    def to_bytes(self) -> bytes:
+        """The raw registers; the precision is implied by their length."""
+        return bytes(self._registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        sketch = cls(len(data).bit_length() - 1)
+        if len(data) != sketch.m:
+            raise ValueError("Register count must be a power of two")
+        sketch._registers = bytearray(data)
+        return sketch
+
+    @property
+    def relative_error(self) -> float:
+        """One standard error, relative to the estimate."""
+        return 1.04 / math.sqrt(self.m)
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -register for register in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return round(estimate)
@@ -0,0 +1,247 @@
+import logging
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import HTTPException, Query, Request
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, String, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.orm import Session
+from .database import Base
+
+try:
+    import duckdb
+    import pyarrow
+    import pyarrow.compute
+except ImportError:  # optional backend
+    duckdb = pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 10_000
+# updated_at moves on every edit, so tables that have it are synced incrementally
+CHANGE_TIMESTAMP = "updated_at"
+# Tables whose rows are never edited once written (ingest skips existing keys) sync on their
+# insert time: table -> column. Everything else, e.g. appointments (status changes in place)
+# and invoice_items (no timestamp of its own), is copied whole on each refresh.
+APPEND_ONLY_TABLES = {
+    "lab_result": "uploaded_at",
+    "lab_result_values": "uploaded_at",
+}
+
+def _duck_type(column) -> str:
+    kind = column.type
+    if isinstance(kind, PG_UUID):
+        return "UUID"
+    if isinstance(kind, ARRAY):
+        return "VARCHAR[]"
+    if isinstance(kind, Boolean):
+        return "BOOLEAN"
+    if isinstance(kind, Integer):
+        return "BIGINT"
+    if isinstance(kind, Float):
+        return "DOUBLE"
+    if isinstance(kind, DateTime):
+        return "TIMESTAMP"
+    if isinstance(kind, Date):
+        return "DATE"
+    return "VARCHAR"
+
+def _plain(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if hasattr(value, "value") and not isinstance(value, (int, float, str)):
+        return value.value  # enum members
+    return value
+
+def _arrow_chunk(names: List[str], plain: List[bool], rows) -> "pyarrow.Table":
+    """
+    Column-wise Arrow table of one chunk. Only UUID and enum columns are converted in
+    Python; everything else goes straight to pyarrow, and DuckDB casts on INSERT ... SELECT.
+    """
+    arrays = []
+    for index, convert in enumerate(plain):
+        values = [row[index] for row in rows]
+        if convert:
+            values = [None if value is None else _plain(value) for value in values]
+        arrays.append(pyarrow.array(values))
+    return pyarrow.Table.from_arrays(arrays, names=names)
+
+class SnapshotStore:
+    """
+    Local DuckDB copy of the tables in app/models.py for heavy read-only analytics.
+    Tables with updated_at (or listed in APPEND_ONLY_TABLES) are synced incrementally
+    (upsert by primary key of rows at or past the last seen timestamp); the rest are
+    replaced on each refresh.
+    """
+
+    def __init__(self, path: str):
+        if duckdb is None:
+            raise RuntimeError("The snapshot backend needs the 'duckdb' and 'pyarrow' packages")
+        self.path = path
+        self._con = duckdb.connect(path)
+        self._lock = threading.Lock()
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS _snapshot_state ("
+            "table_name VARCHAR PRIMARY KEY, watermark TIMESTAMP, refreshed_at TIMESTAMP)"
+        )
+        self._stop = threading.Event()
+
+    # --- Sync ---
+
+    def _ensure_table(self, table):
+        columns = ", ".join(f'"{column.name}" {_duck_type(column)}' for column in table.columns)
+        self._con.execute(f'CREATE TABLE IF NOT EXISTS "{table.name}" ({columns})')
+
+    def _watermark(self, table_name: str) -> Optional[datetime]:
+        row = self._con.execute(
+            "SELECT watermark FROM _snapshot_state WHERE table_name = ?", [table_name]
+        ).fetchone()
+        return row[0] if row else None
+
+    def _sync_table(self, db: Session, table) -> int:
+        self._ensure_table(table)
+        stmt = select(table)
+        timestamp_name = CHANGE_TIMESTAMP if CHANGE_TIMESTAMP in table.c else APPEND_ONLY_TABLES.get(table.name)
+        timestamp = table.c[timestamp_name] if timestamp_name is not None else None
+        watermark = self._watermark(table.name) if timestamp is not None else None
+
+        if watermark is not None:
+            stmt = stmt.where(timestamp >= watermark)
+        columns = [column.name for column in table.columns]
+        keys = [column.name for column in table.primary_key.columns]
+        plain = [isinstance(column.type, (PG_UUID, Enum)) for column in table.columns]
+        selected = ", ".join(f'"{name}"' for name in columns)
+        staging = f"_stg_{table.name}"
+
+        self._con.execute("BEGIN")
+        try:
+            if timestamp is None:
+                self._con.execute(f'DELETE FROM "{table.name}"')
+            self._con.execute(f'CREATE OR REPLACE TEMP TABLE "{staging}" AS SELECT * FROM "{table.name}" LIMIT 0')
+            copied, latest = 0, watermark
+            result = db.connection().execution_options(yield_per=CHUNK_SIZE).execute(stmt)
+            for rows in result.partitions(CHUNK_SIZE):
+                # Bulk INSERT ... SELECT from an Arrow table; executemany inserts row by row
+                chunk = _arrow_chunk(columns, plain, rows)
+                self._con.register("_snapshot_chunk", chunk)
+                try:
+                    self._con.execute(f'INSERT INTO "{staging}" SELECT {selected} FROM _snapshot_chunk')
+                finally:
+                    self._con.unregister("_snapshot_chunk")
+                copied += chunk.num_rows
+                if timestamp_name is not None:
+                    chunk_latest = pyarrow.compute.max(chunk.column(timestamp_name)).as_py()
+                    if chunk_latest and (latest is None or chunk_latest > latest):
+                        latest = chunk_latest
+
+            if watermark is not None and keys:
+                match = " AND ".join(f'"{table.name}"."{key}" = s."{key}"' for key in keys)
+                self._con.execute(f'DELETE FROM "{table.name}" USING "{staging}" s WHERE {match}')
+            self._con.execute(f'INSERT INTO "{table.name}" SELECT * FROM "{staging}"')
+            self._con.execute(f'DROP TABLE "{staging}"')
+            self._con.execute(
+                "INSERT OR REPLACE INTO _snapshot_state VALUES (?, ?, ?)", [table.name, latest, datetime.now()]
+            )
+            self._con.execute("COMMIT")
+        except Exception:
+            self._con.execute("ROLLBACK")
+            raise
+        return copied
+
+    def refresh(self, db: Session) -> Dict[str, int]:
+        """Brings every mapped table up to date; returns rows copied per table."""
+        with self._lock:
+            started = time.perf_counter()
+            copied = {table.name: self._sync_table(db, table) for table in Base.metadata.sorted_tables}
+            db.rollback()
+            logger.info("Snapshot refresh took %.1fs", time.perf_counter() - started)
+            return copied
+
+    def start_background_refresh(self, session_factory, interval_seconds: int):
+        def run():
+            while not self._stop.wait(interval_seconds):
+                db = session_factory()
+                try:
+                    self.refresh(db)
+                except Exception:
+                    logger.exception("Snapshot refresh failed")
+                finally:
+                    db.close()
+        threading.Thread(target=run, name="snapshot-refresh", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Reads ---
+
+    def fetch(self, sql: str, params: Optional[List] = None) -> List[tuple]:
+        cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, params or []).fetchall()
+        finally:
+            cursor.close()
+
+    def daily_lab_load(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, int]:
+        rows = self.fetch(
+            "SELECT CAST(uploaded_at AS DATE) AS day, count(id) FROM lab_result "
+            "WHERE uploaded_at >= ? AND uploaded_at < ? GROUP BY day",
+            [start or date.min, end or date.max]
+        )
+        return {str(day): count for day, count in rows}
+
+    def revenue_by_service(
+        self, hospital_id: UUID, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Dict[str, float]:
+        rows = self.fetch(
+            "SELECT i.reference_type, sum(i.cost) FROM invoice_items i "
+            "JOIN invoices v ON v.invoice_id = i.invoice_id "
+            "WHERE v.hospital_id = ?::UUID AND v.created_at >= ? AND v.created_at < ? "
+            "GROUP BY i.reference_type",
+            [str(hospital_id), start or date.min, end or date.max]
+        )
+        return {reference_type: revenue for reference_type, revenue in rows if reference_type}
+
+    def patient_flow(self, hospital_id: UUID, since: date) -> List[dict]:
+        rows = self.fetch(
+            "SELECT date, count(appointment_id) FROM appointments "
+            "WHERE hospital_id = ?::UUID AND date >= ? AND date <= current_date "
+            "GROUP BY date ORDER BY date DESC",
+            [str(hospital_id), since]
+        )
+        return [{"date": str(day), "count": count} for day, count in rows]
+
+_stores: Dict[str, SnapshotStore] = {}
+
+def get_store(path: str) -> SnapshotStore:
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = SnapshotStore(path)
+    return store
+
+def snapshot_backend(request: Request, backend: Optional[str] = Query(None, pattern="^(primary|snapshot)$")):
+    """
+    Route dependency: returns the snapshot store when this request should run on it
+    (?backend=snapshot, or ANALYTICS_BACKEND=snapshot by default), else None.
+    """
+    settings = request.app.state.settings
+    if (backend or settings.analytics_backend) != "snapshot":
+        return None
+    if duckdb is None:
+        raise HTTPException(status_code=503, detail="Snapshot backend is not installed (needs duckdb and pyarrow)")
+    return get_store(settings.snapshot_path)
+
+if __name__ == "__main__":
+    # Build or top up a snapshot file offline: python -m app.snapshot [path]
+    import sys
+    from .config import Settings
+    from .database import SessionLocal, init_engine
+
+    settings = Settings.from_env()
+    init_engine(settings.database_url)
+    session = SessionLocal()
+    try:
+        print(get_store(sys.argv[1] if len(sys.argv) > 1 else settings.snapshot_path).refresh(session))
+    finally:
+        session.close()
@@ -0,0 +1,229 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.orm import Session
+import app.models as models
+
+# Each doctor-day is a bitmap of 5-minute cells: 288 bits = 36 bytes
+SLOT_MINUTES = 5
+CELLS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = CELLS_PER_DAY // 8
+# Length assumed for slots that only carry a start time ("10:30")
+DEFAULT_SLOT_LENGTH = 30
+# Availability for today and later can still change, so it is re-read after this long
+RECENT_REFRESH_SECONDS = 5 * 60
+
+# "9", "9:30", "09.30" or military "0930" (the shortest hour that leaves two minute digits)
+_TIME_PATTERN = re.compile(r"(\d{1,2}?)(?:[:.]?(\d{2}))?(?!\d)\s*([AaPp]\.?[Mm]\.?)?")
+
+# --- Slot parsing ---
+
+def _to_minutes(match) -> Optional[int]:
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem[0] in "Pp" else 0)
+    if hour > 24 or minute > 59:
+        return None
+    return min(hour * 60 + minute, 24 * 60)
+
+@lru_cache(maxsize=4096)
+def parse_slot(text: Optional[str]) -> Tuple[Tuple[int, int], ...]:
+    """
+    Parses a free-text slot ("09:00-09:30", "0900-0930", "9 AM to 11 AM", "14:00") into
+    (start_minute, end_minute) ranges. A slot past midnight ("11 PM - 1 AM") is split
+    into both ends of its own day. Slot strings repeat heavily, hence the cache.
+    """
+    if not text:
+        return ()
+    ranges = []
+    for part in re.split(r"[,;|]", text):
+        times = [m for m in _TIME_PATTERN.finditer(part) if m.group(0).strip()]
+        if not times:
+            continue
+        end = _to_minutes(times[1]) if len(times) >= 2 else None
+        # A trailing meridiem applies to both ends ("9-11 AM") unless the range crosses
+        # noon or midnight, when the start takes the other one ("11-1 PM" is 11:00-13:00)
+        if len(times) >= 2 and times[1].group(3) and not times[0].group(3):
+            meridiem = times[1].group(3)
+            start = _to_minutes(_TIME_PATTERN.match(times[0].group(0) + meridiem))
+            if start is not None and end is not None and start > end:
+                start = _to_minutes(_TIME_PATTERN.match(times[0].group(0) + ("AM" if meridiem[0] in "Pp" else "PM")))
+        else:
+            start = _to_minutes(times[0])
+        if start is None:
+            continue
+        if end is not None and end < start and not (times[0].group(3) or times[1].group(3)):
+            # "10-2" without AM/PM reads as 10:00-14:00; "22:00-02:00" stays overnight
+            if end < 12 * 60 and end + 12 * 60 > start:
+                end += 12 * 60
+        if end is not None and end < start:
+            ranges.append((start, 24 * 60))
+            start = 0
+        elif end is None or end == start:
+            end = min(start + DEFAULT_SLOT_LENGTH, 24 * 60)
+        if end > start:
+            ranges.append((start, end))
+    return tuple(ranges)
+
+# --- Bitmaps ---
+
+def new_bitmap() -> bytearray:
+    return bytearray(BITMAP_BYTES)
+
+def mark(bitmap: bytearray, ranges: Iterable[Tuple[int, int]]):
+    for start, end in ranges:
+        for cell in range(start // SLOT_MINUTES, -(-end // SLOT_MINUTES)):
+            bitmap[cell >> 3] |= 1 << (cell & 7)
+
+def minutes(bitmap: bytearray) -> int:
+    return int.from_bytes(bitmap, "little").bit_count() * SLOT_MINUTES
+
+def overlap_minutes(left: bytearray, right: bytearray) -> int:
+    both = int.from_bytes(left, "little") & int.from_bytes(right, "little")
+    return both.bit_count() * SLOT_MINUTES
+
+# --- Engine ---
+
+class UtilizationEngine:
+    """
+    Keeps parsed availability bitmaps per (doctor, day) in memory.
+    Past days are loaded once; today and future days are re-read periodically.
+    Appointments are crossed with the bitmaps per request.
+    """
+
+    def __init__(self):
+        self._availability: Dict[Tuple[UUID, date], bytearray] = {}
+        self._doctors: Dict[UUID, Tuple[Optional[UUID], Optional[str]]] = {}
+        self._loaded_at: Dict[date, float] = {}
+        self._lock = threading.Lock()
+
+    def _stale_days(self, start: date, end: date) -> List[date]:
+        now, today = time.monotonic(), date.today()
+        days = []
+        day = start
+        while day <= end:
+            loaded_at = self._loaded_at.get(day)
+            if loaded_at is None or (day >= today and now - loaded_at > RECENT_REFRESH_SECONDS):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def refresh(self, db: Session, start: date, end: date) -> int:
+        """Parses availability for the days in [start, end] that are missing or stale."""
+        with self._lock:
+            days = self._stale_days(start, end)
+            if not days:
+                return 0
+            rows = db.query(
+                models.DoctorAvailability.doctor_id,
+                models.DoctorAvailability.date,
+                models.DoctorAvailabilityTimeSlot.time_slots,
+                models.Staff.hospital_id,
+                models.Doctor.specialization
+            ).join(
+                models.DoctorAvailabilityTimeSlot,
+                models.DoctorAvailabilityTimeSlot.doctor_availability_availability_id == models.DoctorAvailability.availability_id
+            ).join(
+                models.Doctor, models.Doctor.staff_id == models.DoctorAvailability.doctor_id
+            ).join(
+                models.Staff, models.Staff.staff_id == models.Doctor.staff_id
+            ).filter(
+                models.DoctorAvailability.date >= days[0],
+                models.DoctorAvailability.date <= days[-1]
+            ).all()
+
+            stale = set(days)
+            for key in [key for key in self._availability if key[1] in stale]:
+                del self._availability[key]
+            for doctor_id, day, slot, hospital_id, specialization in rows:
+                if day not in stale:
+                    continue
+                self._doctors[doctor_id] = (hospital_id, specialization)
+                bitmap = self._availability.get((doctor_id, day))
+                if bitmap is None:
+                    bitmap = self._availability[(doctor_id, day)] = new_bitmap()
+                mark(bitmap, parse_slot(slot))
+
+            loaded_at = time.monotonic()
+            for day in days:
+                self._loaded_at[day] = loaded_at
+            return len(days)
+
+    def utilization(
+        self,
+        db: Session,
+        start: date,
+        end: date,
+        group_by: List[str],
+        hospital_ids: Optional[List[UUID]] = None
+    ) -> List[Dict]:
+        """Available vs. booked minutes between start and end, grouped by specialty/hospital/day."""
+        self.refresh(db, start, end)
+
+        query = db.query(
+            models.Appointment.doctorId,
+            models.Appointment.date,
+            models.Appointment.timeSlot,
+            models.Appointment.hospitalId
+        ).filter(
+            models.Appointment.date >= start,
+            models.Appointment.date <= end,
+            models.Appointment.doctorId.isnot(None),
+            models.Appointment.status != "CANCELLED"
+        )
+        if hospital_ids:
+            query = query.filter(models.Appointment.hospitalId.in_(hospital_ids))
+
+        with self._lock:
+            # refresh() replaces entries of stale days; bitmaps already published are never changed
+            availability, doctors = dict(self._availability), dict(self._doctors)
+
+        booked: Dict[Tuple[UUID, date], bytearray] = {}
+        for doctor_id, day, slot, hospital_id in query.all():
+            if doctor_id not in doctors:
+                # Booked doctor without any parsed availability yet
+                doctors[doctor_id] = (hospital_id, None)
+            bitmap = booked.get((doctor_id, day))
+            if bitmap is None:
+                bitmap = booked[(doctor_id, day)] = new_bitmap()
+            mark(bitmap, parse_slot(slot))
+
+        wanted = set(hospital_ids) if hospital_ids else None
+        totals = defaultdict(lambda: [0, 0, 0])
+        for key in availability.keys() | booked.keys():
+            doctor_id, day = key
+            if not start <= day <= end:
+                continue
+            hospital_id, specialization = doctors.get(doctor_id, (None, None))
+            if wanted is not None and hospital_id not in wanted:
+                continue
+            available = availability.get(key)
+            appointments = booked.get(key)
+            group = tuple(
+                {"specialty": specialization, "hospital": hospital_id, "day": day}[dim] for dim in group_by
+            )
+            bucket = totals[group]
+            if available is not None:
+                bucket[0] += minutes(available)
+            if appointments is not None:
+                bucket[1] += overlap_minutes(available, appointments) if available is not None else 0
+                bucket[2] += minutes(appointments)
+
+        results = []
+        for group, (available, booked_in_slots, booked_total) in sorted(totals.items(), key=lambda item: str(item[0])):
+            row = dict(zip(group_by, group))
+            row.update({
+                "availableMinutes": available,
+                "bookedMinutes": booked_in_slots,
+                "bookedOutsideAvailability": booked_total - booked_in_slots,
+                "utilization": f"{(booked_in_slots / available * 100) if available else 0:.2f}%"
+            })
+            results.append(row)
+        return results
+
+engine = UtilizationEngine()
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+import app.models as models
+
+# Rows in etl_watermarks: incremental pipelines ("lab_value_index") and
+# ingestion feeds ("billing_pipeline", "clinical_pipeline", ...)
+
+def get_watermark(db: Session, pipeline: str) -> Optional[datetime]:
+    row = db.get(models.EtlWatermark, pipeline)
+    return row.watermark if row else None
+
+def set_watermark(db: Session, pipeline: str, watermark: Optional[datetime]):
+    """Advances (never rewinds) a pipeline watermark inside the caller's transaction."""
+    row = db.get(models.EtlWatermark, pipeline)
+    if row is None:
+        row = models.EtlWatermark(pipeline=pipeline)
+        db.add(row)
+    if watermark is not None and (row.watermark is None or watermark > row.watermark):
+        row.watermark = watermark
+    row.updatedAt = datetime.now()
+    # Flush so a second lookup in the same transaction finds the row
+    db.flush()
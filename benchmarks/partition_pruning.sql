@@ -0,0 +1,108 @@
+-- Heap vs monthly-partitioned appointments at scale.
+--
+--   psql "$DATABASE_URL" -v rows=100000000 -f benchmarks/partition_pruning.sql
+--
+-- Everything is built in a scratch schema (bench_partitions) and dropped at the
+-- end. Rows spread over the last 36 months and 200 hospitals. The same indexes
+-- exist on both tables, so the plans differ only by pruning. Compare "Execution
+-- Time" and "Buffers: shared hit/read" between each pair of EXPLAIN outputs. At
+-- 100M rows, expect about 20 GB of disk and tens of minutes for the load.
+
+\set ON_ERROR_STOP on
+\if :{?rows}
+\else
+    \set rows 10000000
+\endif
+\timing on
+
+DROP SCHEMA IF EXISTS bench_partitions CASCADE;
+CREATE SCHEMA bench_partitions;
+SET search_path = bench_partitions;
+
+CREATE TABLE hospitals AS
+SELECT gen_random_uuid() AS hospital_id, n FROM generate_series(0, 199) AS n;
+
+CREATE TABLE appointments_heap (
+    appointment_id UUID NOT NULL,
+    hospital_id    UUID,
+    patient_id     UUID,
+    date           DATE NOT NULL,
+    status         VARCHAR,
+    created_at     TIMESTAMP,
+    PRIMARY KEY (appointment_id, date)
+);
+
+CREATE TABLE appointments_part (LIKE appointments_heap INCLUDING ALL) PARTITION BY RANGE (date);
+DO $$
+DECLARE month date := date_trunc('month', current_date)::date - interval '36 months';
+BEGIN
+    WHILE month <= date_trunc('month', current_date) + interval '3 months' LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF appointments_part FOR VALUES FROM (%L) TO (%L)',
+            'appointments_part_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+INSERT INTO appointments_heap
+SELECT gen_random_uuid(), h.hospital_id, gen_random_uuid(),
+       current_date - (random() * 1095)::int,
+       (ARRAY['PENDING', 'BOOKED', 'COMPLETED', 'CANCELLED'])[1 + (random() * 3)::int],
+       now() - random() * interval '1095 days'
+FROM generate_series(1, :rows) AS s
+JOIN hospitals h ON h.n = s % 200;
+
+INSERT INTO appointments_part SELECT * FROM appointments_heap;
+
+CREATE INDEX ON appointments_heap (hospital_id, date);
+CREATE INDEX ON appointments_part (hospital_id, date);
+VACUUM ANALYZE appointments_heap;
+VACUUM ANALYZE appointments_part;
+
+SELECT hospital_id AS hospital FROM hospitals WHERE n = 7 \gset
+
+-- 1. Patient flow: last 7 days for one hospital (overall_analytics.py)
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT date, count(appointment_id) FROM appointments_heap
+WHERE hospital_id = :'hospital' AND date >= current_date - 6 AND date <= current_date
+GROUP BY date ORDER BY date DESC;
+
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT date, count(appointment_id) FROM appointments_part
+WHERE hospital_id = :'hospital' AND date >= current_date - 6 AND date <= current_date
+GROUP BY date ORDER BY date DESC;
+
+-- 2. Today's count for one hospital (appointment.py)
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT count(appointment_id) FROM appointments_heap WHERE hospital_id = :'hospital' AND date = current_date;
+
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT count(appointment_id) FROM appointments_part WHERE hospital_id = :'hospital' AND date = current_date;
+
+-- 3. One month across every hospital (list endpoints with start/end)
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT count(*) FROM appointments_heap
+WHERE date >= date_trunc('month', current_date) - interval '1 month' AND date < date_trunc('month', current_date);
+
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT count(*) FROM appointments_part
+WHERE date >= date_trunc('month', current_date) - interval '1 month' AND date < date_trunc('month', current_date);
+
+-- 4. Retention: dropping the oldest month (DELETE vs DETACH)
+BEGIN;
+EXPLAIN (ANALYZE, COSTS OFF)
+DELETE FROM appointments_heap WHERE date < date_trunc('month', current_date) - interval '36 months' + interval '1 month';
+ROLLBACK;
+
+BEGIN;
+SELECT format('ALTER TABLE appointments_part DETACH PARTITION %I',
+              'appointments_part_' || to_char(date_trunc('month', current_date) - interval '36 months', 'YYYY_MM')) \gexec
+ROLLBACK;
+
+SELECT pg_size_pretty(pg_total_relation_size('appointments_heap')) AS heap_size,
+       (SELECT pg_size_pretty(sum(pg_total_relation_size(inhrelid))) FROM pg_inherits
+        WHERE inhparent = 'appointments_part'::regclass) AS partitioned_size;
+
+RESET search_path;
+DROP SCHEMA bench_partitions CASCADE;
@@ -0,0 +1,157 @@
+# Python time per request for the KPI endpoints, one change at a time:
+#   1. legacy db.query(...) chains (eight statements),
+#   2. the same eight statements built once with bound parameters,
+#   3. the merged FILTER statements in app/queries.py (five statements, plus the
+#      department services query),
+#   4. as 3, with department service counts read from the in-memory reference
+#      data (app/refdata.py) instead of the database.
+#
+#   python -m benchmarks.query_cache [iterations]
+#
+# Runs against in-memory SQLite with a few rows so database time is negligible
+# and the numbers are dominated by statement construction, caching and compilation.
+import sys
+import time
+import uuid
+from datetime import date, datetime
+from sqlalchemy import bindparam, create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+import app.models as models
+from app import queries
+from app.database import Base
+from app.refdata import ReferenceDataStore
+
+TABLES = [
+    "beds", "ambulances", "invoices", "departments", "department_treatments_offered", "treatment_records",
+    "appointments", "pharmacy", "medicine"
+]
+
+def _legacy_kpis(db, hospital_id):
+    revenue = db.query(func.sum(models.Invoice.totalAmount)).filter(
+        models.Invoice.hospitalId == hospital_id
+    ).scalar() or 0
+    total_clinical = db.query(models.TreatmentRecord).count()
+    success_clinical = db.query(models.TreatmentRecord).filter(
+        models.TreatmentRecord.outcome == "SUCCESS"
+    ).count()
+    total_beds = db.query(models.Bed).filter(models.Bed.hospitalId == hospital_id).count()
+    occupied = db.query(models.Bed).filter(
+        models.Bed.hospitalId == hospital_id,
+        models.Bed.status == "OCCUPIED"
+    ).count()
+    pending = db.query(models.Appointment).filter(
+        models.Appointment.hospitalId == hospital_id,
+        models.Appointment.status == "PENDING"
+    ).count()
+    ambulances = db.query(models.Ambulance).filter(
+        models.Ambulance.hospitalId == hospital_id,
+        models.Ambulance.available == True
+    ).count()
+    services = db.query(
+        models.Department.deptName,
+        func.count(models.DepartmentTreatment.treatmentName).label("total_services")
+    ).join(models.DepartmentTreatment).filter(
+        models.Department.hospitalId == hospital_id
+    ).group_by(models.Department.deptName).all()
+    return revenue, total_clinical, success_clinical, total_beds, occupied, pending, ambulances, len(services)
+
+SERVICES_STATEMENT = select(
+    models.Department.deptName, func.count(models.DepartmentTreatment.treatmentName)
+).join(models.DepartmentTreatment).where(
+    models.Department.hospitalId == bindparam("hospital_id")
+).group_by(models.Department.deptName)
+
+def _count(stmt):
+    # The SQL Query.count() emits
+    return select(func.count()).select_from(stmt.subquery())
+
+def _legacy_statements(hospital_id):
+    """The eight statements _legacy_kpis runs, as Core selects."""
+    return [
+        select(func.sum(models.Invoice.totalAmount)).where(models.Invoice.hospitalId == hospital_id),
+        _count(select(models.TreatmentRecord)),
+        _count(select(models.TreatmentRecord).where(models.TreatmentRecord.outcome == "SUCCESS")),
+        _count(select(models.Bed).where(models.Bed.hospitalId == hospital_id)),
+        _count(select(models.Bed).where(models.Bed.hospitalId == hospital_id, models.Bed.status == "OCCUPIED")),
+        _count(select(models.Appointment).where(
+            models.Appointment.hospitalId == hospital_id, models.Appointment.status == "PENDING"
+        )),
+        _count(select(models.Ambulance).where(
+            models.Ambulance.hospitalId == hospital_id, models.Ambulance.available == True
+        )),
+        SERVICES_STATEMENT,
+    ]
+
+PRECOMPILED_STATEMENTS = _legacy_statements(bindparam("hospital_id"))
+
+def _precompiled_kpis(db, hospital_id):
+    connection, params = db.connection(), {"hospital_id": hospital_id}
+    *scalars, services = PRECOMPILED_STATEMENTS
+    revenue, *counts = [connection.execute(stmt, params).scalar() for stmt in scalars]
+    return (revenue or 0, *counts, len(connection.execute(services, params).all()))
+
+def _merged_kpis(db, hospital_id, services=None):
+    revenue = queries.total_revenue(db, hospital_id)
+    total_clinical, success_clinical = queries.treatment_outcome_counts(db)
+    total_beds, occupied = queries.bed_counts(db, hospital_id)
+    pending = queries.appointment_count_by_status(db, hospital_id, "PENDING")
+    _, ambulances = queries.ambulance_counts(db, hospital_id)
+    if services is None:
+        services = db.connection().execute(SERVICES_STATEMENT, {"hospital_id": hospital_id}).all()
+    return revenue, total_clinical, success_clinical, total_beds, occupied, pending, ambulances, len(services)
+
+def _cached_kpis(db, hospital_id, refdata):
+    return _merged_kpis(db, hospital_id, refdata.department_service_counts(hospital_id))
+
+def _seed(db, hospital_ids):
+    for hospital_id in hospital_ids:
+        department_id = uuid.uuid4()
+        db.add(models.Department(departmentId=department_id, hospitalId=hospital_id, deptName="Cardiology"))
+        db.add(models.DepartmentTreatment(departmentId=department_id, treatmentName="ECG"))
+        db.add(models.Bed(hospitalId=hospital_id, status="OCCUPIED"))
+        db.add(models.Ambulance(hospitalId=hospital_id, available=True))
+        # The partition keys (created_at, date) are part of the primary key, so they are required
+        db.add(models.Invoice(hospitalId=hospital_id, patientId=uuid.uuid4(), totalAmount=100.0, createdAt=datetime.now()))
+        db.add(models.Appointment(appointmentId=uuid.uuid4(), hospitalId=hospital_id, date=date.today(), status="PENDING"))
+    db.add(models.TreatmentRecord(recordId=uuid.uuid4(), treatmentId=uuid.uuid4(), outcome="SUCCESS"))
+    db.commit()
+
+def _measure(fn, db, hospital_ids, iterations):
+    for hospital_id in hospital_ids:
+        fn(db, hospital_id)  # warm caches
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(db, hospital_ids[i % len(hospital_ids)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main(iterations: int = 2000):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in TABLES])
+    db = sessionmaker(bind=engine)()
+    hospital_ids = [uuid.uuid4() for _ in range(20)]
+    _seed(db, hospital_ids)
+    # hospitals has an ARRAY column SQLite can't create, so only the tables behind the service counts are loaded
+    refdata = ReferenceDataStore()
+    refdata._load_static(db)
+    cached_kpis = lambda db, hospital_id: _cached_kpis(db, hospital_id, refdata)
+
+    variants = [
+        ("legacy query chains (8)", _legacy_kpis),
+        ("same 8, precompiled", _precompiled_kpis),
+        ("merged FILTER (5 + services)", _merged_kpis),
+        ("merged + refdata services", cached_kpis),
+    ]
+    expected = _legacy_kpis(db, hospital_ids[0])
+    assert all(fn(db, hospital_ids[0]) == expected for _, fn in variants)
+
+    print(f"executive-summary KPIs, {iterations} requests")
+    previous = None
+    for label, fn in variants:
+        elapsed = _measure(fn, db, hospital_ids, iterations)
+        # Each step's change relative to the one before it
+        step = f"{(1 - elapsed / previous) * 100:6.1f} % vs. previous" if previous else ""
+        print(f"  {label:<30}: {elapsed:8.1f} us/request  {step}")
+        previous = elapsed
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
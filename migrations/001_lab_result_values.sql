@@ -0,0 +1,28 @@
+-- Typed lab-value index parsed from lab_result.result_data (see app/lab_index.py)
+
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    pipeline    VARCHAR(100) PRIMARY KEY,
+    watermark   TIMESTAMP,
+    updated_at  TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS lab_result_values (
+    id             SERIAL PRIMARY KEY,
+    lab_result_id  UUID NOT NULL REFERENCES lab_result (id),
+    test_id        UUID NOT NULL,
+    hospital_id    UUID REFERENCES hospitals (hospital_id),
+    analyte        VARCHAR(100) NOT NULL,
+    value          DOUBLE PRECISION,
+    unit           VARCHAR(50),
+    abnormal       BOOLEAN,
+    uploaded_at    TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_lab_result_values_lab_result_id
+    ON lab_result_values (lab_result_id);
+CREATE INDEX IF NOT EXISTS ix_lab_result_values_hospital_test_time
+    ON lab_result_values (hospital_id, test_id, uploaded_at);
+
+-- The pipeline scans lab_result by upload time past its watermark
+CREATE INDEX IF NOT EXISTS ix_lab_result_uploaded_at
+    ON lab_result (uploaded_at);
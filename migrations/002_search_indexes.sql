@@ -0,0 +1,37 @@
+-- Trigram and prefix indexes backing /api/v1/search (see app/api/search.py)
+--
+-- The indexes are built CONCURRENTLY so patients, medicine and staff stay
+-- writable meanwhile. CONCURRENTLY can't run inside a transaction block, so run
+-- this file statement by statement: plain psql -f, not -1/--single-transaction.
+-- A build that fails leaves an INVALID index that IF NOT EXISTS would skip;
+-- drop it and re-run.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_full_name_trgm
+    ON patients USING gin (lower(full_name) gin_trgm_ops);
+-- Queries under 3 characters are prefix-only, which trigram indexes can't serve
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_full_name_prefix
+    ON patients (lower(full_name) varchar_pattern_ops);
+
+-- Phone search matches the digits only, so the index is on the same expression
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_hospital_phone_digits
+    ON patients (hospital_id, (regexp_replace(phone_number, '\D', '', 'g')) varchar_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_phone_digits
+    ON patients ((regexp_replace(phone_number, '\D', '', 'g')) varchar_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_medicine_name_trgm
+    ON medicine USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_medicine_manufacturer_trgm
+    ON medicine USING gin (lower(manufacturer) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_medicine_name_prefix
+    ON medicine (lower(name) varchar_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_medicine_manufacturer_prefix
+    ON medicine (lower(manufacturer) varchar_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_staff_full_name_trgm
+    ON staff USING gin (lower(full_name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_staff_full_name_prefix
+    ON staff (lower(full_name) varchar_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_staff_hospital_id
+    ON staff (hospital_id);
@@ -0,0 +1,83 @@
+-- Typed, indexed hospital affiliations for pharmacies and diagnostic centres.
+-- Values that are not valid UUIDs of an existing hospital are cleared so the
+-- foreign keys can be added. Their original text is kept in
+-- affiliation_legacy first, and a NOTICE reports how many rows were cleared:
+--   SELECT * FROM affiliation_legacy ORDER BY source_table, row_id;
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS affiliation_legacy (
+    source_table  VARCHAR(50) NOT NULL,
+    row_id        VARCHAR NOT NULL,
+    original      VARCHAR NOT NULL,
+    cleared_at    TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (source_table, row_id)
+);
+
+INSERT INTO affiliation_legacy (source_table, row_id, original)
+SELECT 'pharmacy', id, affiliated_hospital_id FROM pharmacy
+WHERE affiliated_hospital_id IS NOT NULL
+  AND CASE
+        WHEN affiliated_hospital_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+        THEN NOT EXISTS (SELECT 1 FROM hospitals h WHERE h.hospital_id = affiliated_hospital_id::uuid)
+        ELSE TRUE
+      END
+ON CONFLICT DO NOTHING;
+
+INSERT INTO affiliation_legacy (source_table, row_id, original)
+SELECT 'diagnostic_centre', id, affiliated_hospital FROM diagnostic_centre
+WHERE affiliated_hospital IS NOT NULL
+  AND CASE
+        WHEN affiliated_hospital ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+        THEN NOT EXISTS (SELECT 1 FROM hospitals h WHERE h.hospital_id = affiliated_hospital::uuid)
+        ELSE TRUE
+      END
+ON CONFLICT DO NOTHING;
+
+DO $$
+DECLARE cleared bigint;
+BEGIN
+    SELECT count(*) INTO cleared FROM affiliation_legacy;
+    IF cleared > 0 THEN
+        RAISE NOTICE '% affiliation value(s) are not hospital ids; originals kept in affiliation_legacy', cleared;
+    END IF;
+END $$;
+
+UPDATE pharmacy SET affiliated_hospital_id = NULL
+WHERE affiliated_hospital_id IS NOT NULL
+  AND CASE
+        WHEN affiliated_hospital_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+        THEN NOT EXISTS (SELECT 1 FROM hospitals h WHERE h.hospital_id = affiliated_hospital_id::uuid)
+        ELSE TRUE
+      END;
+
+ALTER TABLE pharmacy
+    ALTER COLUMN affiliated_hospital_id TYPE UUID USING affiliated_hospital_id::uuid,
+    ADD CONSTRAINT fk_pharmacy_affiliated_hospital
+        FOREIGN KEY (affiliated_hospital_id) REFERENCES hospitals (hospital_id);
+
+CREATE INDEX IF NOT EXISTS ix_pharmacy_affiliated_hospital_id
+    ON pharmacy (affiliated_hospital_id);
+
+UPDATE diagnostic_centre SET affiliated_hospital = NULL
+WHERE affiliated_hospital IS NOT NULL
+  AND CASE
+        WHEN affiliated_hospital ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+        THEN NOT EXISTS (SELECT 1 FROM hospitals h WHERE h.hospital_id = affiliated_hospital::uuid)
+        ELSE TRUE
+      END;
+
+ALTER TABLE diagnostic_centre
+    ALTER COLUMN affiliated_hospital TYPE UUID USING affiliated_hospital::uuid,
+    ADD CONSTRAINT fk_diagnostic_centre_affiliated_hospital
+        FOREIGN KEY (affiliated_hospital) REFERENCES hospitals (hospital_id);
+
+-- Rankings read centres of one hospital ordered by rating
+CREATE INDEX IF NOT EXISTS ix_diagnostic_centre_affiliated_hospital_rating
+    ON diagnostic_centre (affiliated_hospital, rating DESC NULLS LAST);
+
+-- Network lookups read these per hospital as well
+CREATE INDEX IF NOT EXISTS ix_departments_hospital_id ON departments (hospital_id);
+CREATE INDEX IF NOT EXISTS ix_ambulances_hospital_id ON ambulances (hospital_id);
+
+COMMIT;
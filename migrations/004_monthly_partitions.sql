@@ -0,0 +1,119 @@
+-- Monthly range partitions for appointments (date), lab_result (uploaded_at)
+-- and invoices (created_at). Each table is renamed to <table>_legacy, recreated
+-- as a partitioned parent with the same columns, and its rows are copied over.
+-- Partitions exist from the oldest month in the data to three months past the
+-- current one, clamped to the last ten years. Rows outside that window (e.g.
+-- typos like 0202 or 2202) land in a DEFAULT partition, and a NOTICE reports
+-- how many. app/partitions.py keeps future months created (moving matching rows
+-- out of DEFAULT) and can detach old ones.
+--
+-- Caveats:
+--   * The primary key must contain the partition key, so it becomes
+--     (appointment_id, date), (id, uploaded_at) and (invoice_id, created_at).
+--     Those columns become NOT NULL, and the migration stops if any row has a
+--     NULL there. Backfill those rows first with the best real date you have,
+--     not a sentinel like 1970-01-01. A sentinel lands in DEFAULT and is
+--     counted in every date-range query that reaches back that far.
+--   * A foreign key can only target a unique constraint, and invoice_id or id
+--     alone is no longer unique. The foreign keys from invoice_items and
+--     insurance_claims to invoices, and from lab_result_values to lab_result,
+--     are therefore dropped. The ORM relationships still work, and the ingest
+--     path (app/ingest.py) loads parents before children.
+--     Foreign keys from the partitioned tables themselves (e.g.
+--     invoices.hospital_id -> hospitals) are re-created on the new parent.
+--   * The legacy tables are kept for verification. Drop them afterwards:
+--       DROP TABLE appointments_legacy, lab_result_legacy, invoices_legacy;
+
+BEGIN;
+
+CREATE FUNCTION pg_temp.partition_monthly(tbl text, key text, pk text) RETURNS void AS $$
+DECLARE
+    legacy text := tbl || '_legacy';
+    has_nulls boolean;
+    constraint_row record;
+    index_row record;
+    outliers bigint;
+    first_month date;
+    last_month date;
+    month date;
+BEGIN
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I IS NULL)', tbl, key) INTO has_nulls;
+    IF has_nulls THEN
+        RAISE EXCEPTION '%.% has NULL values; backfill them before partitioning', tbl, key;
+    END IF;
+
+    FOR constraint_row IN
+        SELECT conrelid::regclass AS child, conname FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = tbl::regclass
+    LOOP
+        RAISE NOTICE 'Dropping foreign key % on %', constraint_row.conname, constraint_row.child;
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', constraint_row.child, constraint_row.conname);
+    END LOOP;
+
+    -- Free the table, primary key and index names for the partitioned parent
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, legacy);
+    FOR index_row IN
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = legacy::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', index_row.relname, left(index_row.relname, 56) || '_legacy');
+    END LOOP;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (%I)', tbl, legacy, key);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (%I, %I)', tbl, pk, key);
+
+    EXECUTE format('SELECT date_trunc(''month'', min(%I))::date, date_trunc(''month'', max(%I))::date FROM %I', key, key, legacy)
+        INTO first_month, last_month;
+    -- Clamped so a single bad timestamp can't create thousands of empty partitions
+    first_month := greatest(
+        least(coalesce(first_month, date_trunc('month', now())::date), date_trunc('month', now())::date),
+        (date_trunc('month', now()) - interval '10 years')::date
+    );
+    last_month := (date_trunc('month', now()) + interval '3 months')::date;
+
+    month := first_month;
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            tbl || '_' || to_char(month, 'YYYY_MM'), tbl, month, (month + interval '1 month')::date
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, legacy);
+    EXECUTE format('SELECT count(*) FROM %I', tbl || '_default') INTO outliers;
+    IF outliers > 0 THEN
+        RAISE NOTICE '% rows of % fall outside % .. % and went to %_default', outliers, tbl, first_month, last_month, tbl;
+    END IF;
+
+    -- LIKE doesn't copy foreign keys; re-create the outgoing ones (the legacy table keeps its own)
+    FOR constraint_row IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition FROM pg_constraint
+        WHERE contype = 'f' AND conrelid = legacy::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', tbl, constraint_row.conname, constraint_row.definition);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT pg_temp.partition_monthly('appointments', 'date', 'appointment_id');
+SELECT pg_temp.partition_monthly('lab_result', 'uploaded_at', 'id');
+SELECT pg_temp.partition_monthly('invoices', 'created_at', 'invoice_id');
+
+-- Indexes on the parent cascade to every partition, including future ones.
+-- Each leads with the column the API filters on, so the scan stays inside the
+-- partitions that survive pruning.
+CREATE INDEX ix_appointments_hospital_date ON appointments (hospital_id, date);
+CREATE INDEX ix_appointments_hospital_status ON appointments (hospital_id, status);
+CREATE INDEX ix_lab_result_uploaded_at ON lab_result (uploaded_at);
+CREATE INDEX ix_lab_result_uploaded_by ON lab_result (uploaded_by);
+CREATE INDEX ix_invoices_hospital_created_at ON invoices (hospital_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_invoice_items_invoice_id ON invoice_items (invoice_id);
+CREATE INDEX IF NOT EXISTS ix_insurance_claims_invoice_id ON insurance_claims (invoice_id);
+
+COMMIT;
+
+ANALYZE appointments;
+ANALYZE lab_result;
+ANALYZE invoices;
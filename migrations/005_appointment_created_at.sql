@@ -0,0 +1,5 @@
+-- The distinct-patient sketches (app/approx.py) top up from appointments created
+-- since their watermark. Created on the partitioned parent, so every monthly
+-- partition gets its own index.
+
+CREATE INDEX IF NOT EXISTS ix_appointments_created_at ON appointments (created_at);
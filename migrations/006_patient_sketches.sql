@@ -0,0 +1,11 @@
+-- Distinct-patient HyperLogLog sketches (app/approx.py), one row per hospital and
+-- appointment month. Instances load them at first use and top them up from the
+-- "patient_sketches" row in etl_watermarks instead of rescanning appointments.
+
+CREATE TABLE IF NOT EXISTS patient_sketches (
+    hospital_id  UUID NOT NULL,
+    month        DATE NOT NULL,
+    registers    BYTEA NOT NULL,
+    updated_at   TIMESTAMP,
+    PRIMARY KEY (hospital_id, month)
+);
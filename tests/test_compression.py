@@ -0,0 +1,24 @@
+from app.compression import negotiate
+
+SUPPORTED = ["zstd", "br", "gzip"]
+
+
+def test_highest_quality_wins():
+    assert negotiate("gzip;q=1.0, br;q=0.5", SUPPORTED) == "gzip"
+
+
+def test_ties_follow_server_preference():
+    assert negotiate("gzip, br, zstd", SUPPORTED) == "zstd"
+    assert negotiate("gzip, br", SUPPORTED) == "br"
+
+
+def test_wildcard_and_explicit_refusal():
+    assert negotiate("*", SUPPORTED) == "zstd"
+    assert negotiate("*, zstd;q=0", SUPPORTED) == "br"
+
+
+def test_nothing_acceptable():
+    assert negotiate("", SUPPORTED) is None
+    assert negotiate("identity", SUPPORTED) is None
+    assert negotiate("gzip;q=0", SUPPORTED) is None
+    assert negotiate("gzip;q=abc", SUPPORTED) is None
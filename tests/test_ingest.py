@@ -0,0 +1,57 @@
+import pytest
+from app.ingest import IngestError, parse_batch
+
+
+def test_ndjson_invoice_with_embedded_items():
+    body = (b'{"invoice_id": "a", "hospitalId": "h", "patientId": "p", "createdAt": "2026-01-01", '
+            b'"totalAmount": 5, "items": [{"item_id": "i1", "cost": 2}]}\n')
+    rows = parse_batch("invoices", body, "ndjson")
+    assert rows["invoices"] == [
+        {"invoice_id": "a", "hospital_id": "h", "patient_id": "p", "created_at": "2026-01-01", "total_amount": 5}
+    ]
+    assert rows["invoice_items"] == [{"invoice_id": "a", "item_id": "i1", "cost": 2}]
+
+
+def test_csv_empty_values_become_null():
+    body = b"invoice_id,hospital_id,patient_id,created_at,total_amount\na,h,p,2026-01-01,\n"
+    rows = parse_batch("invoices", body, "csv")
+    assert rows == {"invoices": [
+        {"invoice_id": "a", "hospital_id": "h", "patient_id": "p", "created_at": "2026-01-01", "total_amount": None}
+    ]}
+
+
+@pytest.mark.parametrize("body, fmt, message", [
+    (b'{"invoice_id": "a"}\n', "ndjson", "missing primary key"),
+    (b'{"invoice_id": "a", "created_at": "2026-01-01", "colour": 1}\n', "ndjson", "unknown field"),
+    (b'{"invoice_id": "a", "created_at": "2026-01-01"}\n', "ndjson", "missing required field.*hospital_id, patient_id"),
+    (b"invoice_id,hospital_id,patient_id,created_at\na,h,,2026-01-01\n", "csv", "missing required field.*patient_id"),
+    (b'{"invoice_id": "a", "hospital_id": "h", "patient_id": "p", "created_at": "2026-01-01", "items": {"cost": 1}}\n', "ndjson", "'items' must be a list"),
+    (b"[1, 2]\n", "ndjson", "expected an object"),
+    (b"{not json\n", "ndjson", "Invalid NDJSON"),
+    (b"invoice_id,created_at\na,2026-01-01,extra\n", "csv", "more values than header columns"),
+    (b"\xff\xfe", "csv", "not valid UTF-8"),
+])
+def test_malformed_batches_raise(body, fmt, message):
+    with pytest.raises(IngestError, match=message):
+        parse_batch("invoices", body, fmt)
+
+
+def test_oversized_body_is_rejected_before_parsing(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    import app.api.ingest as ingest_api
+    from app.database import get_db
+
+    monkeypatch.setattr(ingest_api, "MAX_BATCH_BYTES", 16)
+    app = FastAPI()
+    app.include_router(ingest_api.router)
+    app.dependency_overrides[get_db] = lambda: None
+
+    def chunks():
+        yield b'{"invoice_id": "a",'
+        yield b' "created_at": "2026-01-01"}\n'
+
+    client = TestClient(app)
+    assert client.post("/invoices", content=b"x" * 17).status_code == 413
+    # Without Content-Length the streamed total is what trips the cap
+    assert client.post("/invoices", content=chunks()).status_code == 413
@@ -0,0 +1,39 @@
+import time
+from app.lab_index import parse_result_data
+
+
+def test_text_lines_with_ranges_and_flags():
+    values = parse_result_data("Hemoglobin: 11.2 g/dL (13.0-17.0) L; Creatinine 1.1 H\nGlucose 90 mg/dL (70-110)")
+    assert values == [
+        {"analyte": "Hemoglobin", "value": 11.2, "unit": "g/dL", "abnormal": True},
+        {"analyte": "Creatinine", "value": 1.1, "unit": None, "abnormal": True},
+        {"analyte": "Glucose", "value": 90.0, "unit": "mg/dL", "abnormal": False},
+    ]
+
+
+def test_json_results_object_uses_reference_range():
+    values = parse_result_data('{"results": {"WBC": {"value": "12.5", "unit": "10^9/L", "refLow": 4, "refHigh": 11}}}')
+    assert values == [{"analyte": "WBC", "value": 12.5, "unit": "10^9/L", "abnormal": True}]
+
+
+def test_json_list_keeps_explicit_abnormal_flag():
+    values = parse_result_data('[{"name": "Sodium", "value": 150, "low": 135, "high": 145, "abnormal": false}]')
+    assert values == [{"analyte": "Sodium", "value": 150.0, "unit": None, "abnormal": False}]
+
+
+def test_blank_and_unparseable_payloads():
+    assert parse_result_data(None) == []
+    assert parse_result_data("   ") == []
+    assert parse_result_data("pending review") == []
+
+
+def test_padded_lines_do_not_backtrack():
+    started = time.perf_counter()
+    assert parse_result_data("A" + " " * 2000 + "x") == []
+    assert parse_result_data("A" + " a" * 5000 + "x") == []
+    assert time.perf_counter() - started < 1
+
+
+def test_whitespace_runs_are_collapsed():
+    values = parse_result_data("Hemoglobin    :   11.2    g/dL   (13.0 - 17.0)   L")
+    assert values == [{"analyte": "Hemoglobin", "value": 11.2, "unit": "g/dL", "abnormal": True}]
@@ -0,0 +1,86 @@
+import random
+import uuid
+import numpy as np
+import pytest
+import app.approx as approx
+from app.sketches import HyperLogLog, TDigest
+
+
+def test_tdigest_quantiles_close_to_exact():
+    rng = random.Random(7)
+    values = [rng.gauss(100, 15) for _ in range(50_000)]
+    digest = TDigest().update(values)
+    ordered = sorted(values)
+    for q in (0.01, 0.5, 0.9, 0.99):
+        assert digest.quantile(q) == pytest.approx(ordered[int(q * (len(ordered) - 1))], abs=1.0)
+    assert digest.quantile(0) == min(values)
+    assert digest.quantile(1) == max(values)
+
+
+def test_tdigest_merge_matches_single_digest():
+    rng = random.Random(11)
+    left_values = [rng.uniform(0, 100) for _ in range(20_000)]
+    right_values = [rng.uniform(50, 150) for _ in range(20_000)]
+    merged = TDigest().update(left_values).merge(TDigest().update(right_values))
+    whole = TDigest().update(left_values + right_values)
+    assert merged.count == 40_000
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    for q in (0.1, 0.5, 0.9):
+        assert merged.quantile(q) == pytest.approx(whole.quantile(q), rel=0.02)
+
+
+def test_tdigest_empty_and_none_values():
+    assert TDigest().quantile(0.5) is None
+    assert TDigest().update([None, 3.0, None]).quantile(0.5) == 3.0
+
+
+def test_tdigest_accepts_numpy_chunks_and_skips_nan():
+    digest = TDigest().update(np.array([1.0, np.nan, 3.0]))
+    assert digest.count == 2
+    assert digest.quantile(0.5) == pytest.approx(2.0)
+
+
+def test_hyperloglog_count_within_error():
+    ids = [uuid.uuid4() for _ in range(20_000)]
+    sketch = HyperLogLog().update(ids + ids[:5000])
+    assert sketch.count() == pytest.approx(20_000, rel=4 * sketch.relative_error)
+
+
+def test_hyperloglog_small_sets_are_near_exact():
+    assert HyperLogLog().count() == 0
+    assert HyperLogLog().update(range(100)).count() == pytest.approx(100, abs=2)
+
+
+def test_hyperloglog_merge_is_union():
+    shared = [uuid.uuid4() for _ in range(5000)]
+    left = HyperLogLog().update(shared + [uuid.uuid4() for _ in range(5000)])
+    right = HyperLogLog().update(shared + [uuid.uuid4() for _ in range(5000)])
+    union = left.copy().merge(right)
+    assert union.count() == pytest.approx(15_000, rel=4 * union.relative_error)
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(precision=10))
+
+
+def test_hyperloglog_bytes_round_trip():
+    sketch = HyperLogLog(precision=10).update(range(1000))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored.precision == 10
+    assert restored.count() == sketch.count()
+
+
+def test_months_before_the_sketch_horizon_are_counted_exactly(monkeypatch):
+    hospital = uuid.uuid4()
+    horizon = approx.sketch_horizon()
+    old_month = approx._month(horizon) - 1
+    old_patients = [uuid.uuid4() for _ in range(3)]
+    recent = [uuid.uuid4() for _ in range(40)]
+    monkeypatch.setattr(approx, "_exact_per_month", lambda db, h, start, end: {old_month: 3})
+    monkeypatch.setattr(approx, "_patient_ids", lambda db, h, start, end: old_patients)
+
+    sketches = approx.DistinctPatientSketches()
+    sketches._sketches = {(hospital, approx._month(horizon)): HyperLogLog().update(recent + old_patients[:1])}
+    result = sketches.count(None, hospital, approx._month_date(old_month - 1), approx._month_date(approx._month(horizon) + 1))
+    assert [m["distinctPatients"] for m in result["months"]][:2] == [0, 3]
+    assert [m["errorBound"] for m in result["months"]][:2] == [0, 0]
+    assert result["months"][2]["distinctPatients"] == pytest.approx(41, abs=2)
+    assert result["total"]["distinctPatients"] == pytest.approx(43, abs=2)
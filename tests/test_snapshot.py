@@ -0,0 +1,61 @@
+import uuid
+from datetime import date, datetime
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+import app.models as models
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+from app.snapshot import SnapshotStore
+
+TABLES = [models.Appointment.__table__, models.Invoice.__table__, models.InvoiceItem.__table__, models.LabResult.__table__]
+
+
+@pytest.fixture
+def source():
+    # SQLite stands in for Postgres, so the whole sync runs without a server
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as db:
+        yield db
+
+
+def _sync(store, db):
+    return {table.name: store._sync_table(db, table) for table in TABLES}
+
+
+def test_snapshot_picks_up_edits_to_tables_without_a_change_timestamp(source, tmp_path):
+    hospital, invoice_id = uuid.uuid4(), uuid.uuid4()
+    appointment = models.Appointment(
+        appointmentId=uuid.uuid4(), hospitalId=hospital, patientId=uuid.uuid4(), date=date.today(),
+        status="SCHEDULED", createdAt=datetime(2026, 1, 1)
+    )
+    invoice = models.Invoice(
+        invoiceId=invoice_id, hospitalId=hospital, patientId=uuid.uuid4(), createdAt=datetime(2026, 1, 1)
+    )
+    item = models.InvoiceItem(itemId=uuid.uuid4(), invoiceId=invoice_id, referenceType="LAB", cost=10.0)
+    lab = models.LabResult(id=uuid.uuid4(), testId=uuid.uuid4(), uploadedAt=datetime(2026, 1, 1))
+    # Newer rows, so a created_at watermark would move past the ones edited below
+    later = [
+        models.Appointment(appointmentId=uuid.uuid4(), hospitalId=uuid.uuid4(), date=date.today(), createdAt=datetime(2026, 2, 1)),
+        models.Invoice(invoiceId=uuid.uuid4(), hospitalId=uuid.uuid4(), patientId=uuid.uuid4(), createdAt=datetime(2026, 2, 1)),
+    ]
+    source.add_all([appointment, invoice, item, lab, *later])
+    source.commit()
+
+    store = SnapshotStore(str(tmp_path / "snapshot.duckdb"))
+    _sync(store, source)
+    assert store.revenue_by_service(hospital) == {"LAB": 10.0}
+
+    # A status change and a new item on an invoice that was already synced, with no timestamp moving
+    source.execute(update(models.Appointment).where(models.Appointment.hospitalId == hospital).values(status="COMPLETED"))
+    source.add(models.InvoiceItem(itemId=uuid.uuid4(), invoiceId=invoice_id, referenceType="PHARMACY", cost=4.0))
+    source.commit()
+    copied = _sync(store, source)
+
+    assert store.fetch("SELECT status FROM appointments WHERE hospital_id = ?::UUID", [str(hospital)]) == [("COMPLETED",)]
+    assert store.revenue_by_service(hospital) == {"LAB": 10.0, "PHARMACY": 4.0}
+    # Append-only lab results are still incremental: only the row at the watermark is re-read
+    assert copied["lab_result"] == 1
+    assert store.fetch("SELECT count(*) FROM lab_result") == [(1,)]
@@ -0,0 +1,38 @@
+from app.utilization import DEFAULT_SLOT_LENGTH, parse_slot
+
+
+def test_colon_and_military_ranges():
+    assert parse_slot("09:00-09:30") == ((540, 570),)
+    assert parse_slot("0900-1000") == ((540, 600),)
+    assert parse_slot("930-1030") == ((570, 630),)
+
+
+def test_meridiem_on_both_or_trailing_end():
+    assert parse_slot("9 AM to 11 AM") == ((540, 660),)
+    assert parse_slot("9-11 AM") == ((540, 660),)
+    assert parse_slot("12 PM - 1 PM") == ((720, 780),)
+
+
+def test_trailing_meridiem_across_noon_flips_the_start():
+    assert parse_slot("11-1 PM") == ((660, 780),)
+    assert parse_slot("11:30-12:30 PM") == ((690, 750),)
+    assert parse_slot("9-5 PM") == ((540, 1020),)
+
+
+def test_start_only_gets_default_length():
+    assert parse_slot("14:00") == ((840, 840 + DEFAULT_SLOT_LENGTH),)
+
+
+def test_overnight_slot_is_split_at_midnight():
+    assert parse_slot("11 PM - 1 AM") == ((1380, 1440), (0, 60))
+    assert parse_slot("22:00-02:00") == ((1320, 1440), (0, 120))
+
+
+def test_twelve_hour_range_without_meridiem_reads_as_afternoon():
+    assert parse_slot("10-2") == ((600, 840),)
+
+
+def test_several_parts_and_empty_input():
+    assert parse_slot("09:00-10:00, 14:00-15:00") == ((540, 600), (840, 900))
+    assert parse_slot("") == ()
+    assert parse_slot(None) == ()